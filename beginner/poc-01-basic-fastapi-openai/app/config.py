@@ -17,9 +17,19 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-3.5-turbo"
     openai_timeout: int = 30
+    openai_max_connections: int = 200
+    openai_max_keepalive_connections: int = 100
+    openai_prewarm: bool = True
+    openai_batch_concurrency: int = 20
+    openai_short_concurrency: int = 128
+    openai_long_concurrency: int = 16
+    openai_short_max_tokens: int = 256
+    openai_qpm: int = 500
 
     # Application Configuration
     log_level: str = "INFO"
+    workers: int = 1
+    reload: bool = False
 
     class Config:
         env_file = ".env"
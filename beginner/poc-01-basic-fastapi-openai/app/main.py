@@ -2,25 +2,63 @@
 Main FastAPI application with OpenAI integration.
 POC 1: Basic FastAPI + OpenAI Integration
 """
+import asyncio
 import logging
-from contextlib import asynccontextmanager
-
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
-from openai import OpenAI, OpenAIError, APIError, RateLimitError, APIConnectionError
-
-from app.config import get_settings
-from app.models import ChatRequest, ChatResponse, HealthResponse, ErrorResponse
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+import os
+import queue
+from contextlib import AsyncExitStack, asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import httpx
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from openai import AsyncOpenAI, OpenAIError, APIError, RateLimitError, APIConnectionError, NotFoundError
+
+from app.config import Settings, get_settings
+from app.models import (
+    ChatRequest,
+    ChatResponse,
+    BatchChatRequest,
+    BatchChatItem,
+    BatchChatResponse,
+    AsyncBatchRequest,
+    AsyncBatchStatus,
+    HealthResponse,
+    ErrorResponse
 )
+from app.rate_limiter import TokenBucket
+
+# Configure logging: request handlers only enqueue records, a background
+# listener thread formats them and writes to stderr
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+)
+log_listener = QueueListener(log_queue, log_handler)
+queue_handler = QueueHandler(log_queue)
+# Without its own formatter, basicConfig would give the queue handler the
+# default "LEVEL:name:message" format, which the listener then wraps again
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
 logger = logging.getLogger(__name__)
 
-# Global OpenAI client
-openai_client: OpenAI = None
+
+async def prewarm_openai_connection(client: AsyncOpenAI):
+    """
+    Open a keep-alive connection to the OpenAI API before serving traffic.
+
+    The first request then reuses a pooled connection instead of paying for
+    the TCP and TLS handshakes. Failures are logged and otherwise ignored.
+    """
+    try:
+        await client.with_options(max_retries=0, timeout=5).models.list()
+        logger.info("OpenAI connection pre-warmed")
+    except Exception as e:
+        logger.warning("Failed to pre-warm OpenAI connection: %s", e)
 
 
 @asynccontextmanager
@@ -29,24 +67,47 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for startup and shutdown events.
     """
     # Startup
-    global openai_client
+    log_listener.start()
     settings = get_settings()
 
     logger.info("Initializing OpenAI client...")
     try:
-        openai_client = OpenAI(
+        # A single pooled async client lets concurrent requests share
+        # keep-alive connections instead of blocking the event loop
+        app.state.openai_client = AsyncOpenAI(
             api_key=settings.openai_api_key,
-            timeout=settings.openai_timeout
+            timeout=settings.openai_timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_keepalive_connections
+                )
+            )
         )
         logger.info("OpenAI client initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize OpenAI client: {str(e)}")
+        logger.error("Failed to initialize OpenAI client: %s", e)
         raise
 
+    # The health payload is static, so probes get pre-serialized bytes
+    app.state.health_body = orjson.dumps(
+        HealthResponse(status="healthy", version=settings.api_version).model_dump()
+    )
+
+    if settings.openai_prewarm:
+        await prewarm_openai_connection(app.state.openai_client)
+
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
+    await app.state.openai_client.close()
+    log_listener.stop()
+
+
+def get_openai_client(request: Request) -> AsyncOpenAI:
+    """Get the OpenAI client created during application startup."""
+    return request.app.state.openai_client
 
 
 # Initialize FastAPI app
@@ -55,30 +116,80 @@ app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description=settings.api_description,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Bound in-flight OpenAI calls in separate pools for short and long
+# generations, so short requests never queue behind long ones, and smooth
+# bursts to the account's QPM limit
+SHORT_SEM = asyncio.Semaphore(settings.openai_short_concurrency)
+LONG_SEM = asyncio.Semaphore(settings.openai_long_concurrency)
+openai_bucket = TokenBucket(
+    rate=settings.openai_qpm / 60,
+    capacity=settings.openai_short_concurrency + settings.openai_long_concurrency
+)
+
+
+@asynccontextmanager
+async def openai_call_slot(max_tokens: Optional[int]):
+    """
+    Hold a concurrency slot and rate limit token for one OpenAI call.
+
+    Waits for a slot in the short or long pool (depending on max_tokens)
+    and a rate limit token, and backs off the token bucket when OpenAI
+    reports a rate limit.
+    """
+    is_short = max_tokens is not None and max_tokens <= settings.openai_short_max_tokens
+    async with SHORT_SEM if is_short else LONG_SEM:
+        await openai_bucket.acquire()
+        try:
+            yield
+        except RateLimitError:
+            openai_bucket.decay()
+            raise
+    openai_bucket.recover()
+
+
+async def create_chat_completion(client: AsyncOpenAI, **kwargs):
+    """Call the OpenAI chat completions API within the configured limits (see openai_call_slot)."""
+    async with openai_call_slot(kwargs.get("max_tokens")):
+        return await client.chat.completions.create(**kwargs)
+
+
+# HTTP status and detail for each OpenAI error type; subclasses resolve to
+# their nearest listed base (e.g. APITimeoutError -> APIConnectionError)
+OPENAI_ERROR_RESPONSES = {
+    RateLimitError: (status.HTTP_429_TOO_MANY_REQUESTS, "OpenAI API rate limit exceeded. Please try again later."),
+    APIConnectionError: (status.HTTP_503_SERVICE_UNAVAILABLE, "Unable to connect to OpenAI API. Please try again later."),
+    APIError: (status.HTTP_502_BAD_GATEWAY, "OpenAI API error: {error}"),
+    OpenAIError: (status.HTTP_500_INTERNAL_SERVER_ERROR, "OpenAI error: {error}"),
+}
+
+
+def openai_http_exception(error: OpenAIError) -> HTTPException:
+    """Map an OpenAI error to the HTTPException returned to the client."""
+    status_code, detail = next(
+        OPENAI_ERROR_RESPONSES[cls] for cls in type(error).__mro__ if cls in OPENAI_ERROR_RESPONSES
+    )
+    logger.error("OpenAI error (%s): %s", type(error).__name__, error)
+    return HTTPException(status_code=status_code, detail=detail.format(error=error))
+
 
 @app.get("/", response_model=HealthResponse, tags=["Health"])
-async def root():
+async def root(request: Request):
     """
     Root endpoint - health check.
     """
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version
-    )
+    return Response(content=request.app.state.health_body, media_type="application/json")
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint to verify service is running.
     """
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version
-    )
+    return Response(content=request.app.state.health_body, media_type="application/json")
 
 
 @app.post(
@@ -92,7 +203,11 @@ async def health_check():
     },
     tags=["Chat"]
 )
-async def chat_completion(request: ChatRequest):
+async def chat_completion(
+    request: ChatRequest,
+    client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_settings)
+):
     """
     Generate a chat completion using OpenAI.
 
@@ -105,8 +220,10 @@ async def chat_completion(request: ChatRequest):
     Raises:
         HTTPException: On OpenAI API errors or validation failures
     """
+    model = settings.openai_model
+
     try:
-        logger.info(f"Received chat request with message: {request.message[:50]}...")
+        logger.info("Received chat request with message: %s...", request.message[:50])
 
         # Prepare messages for OpenAI
         messages = [
@@ -115,9 +232,10 @@ async def chat_completion(request: ChatRequest):
         ]
 
         # Call OpenAI API
-        logger.info(f"Calling OpenAI API with model: {settings.openai_model}")
-        response = openai_client.chat.completions.create(
-            model=settings.openai_model,
+        logger.info("Calling OpenAI API with model: %s", model)
+        response = await create_chat_completion(
+            client,
+            model=model,
             messages=messages,
             temperature=request.temperature,
             max_tokens=request.max_tokens
@@ -128,58 +246,361 @@ async def chat_completion(request: ChatRequest):
         tokens_used = response.usage.total_tokens
         finish_reason = response.choices[0].finish_reason
 
-        logger.info(f"OpenAI response received. Tokens used: {tokens_used}")
+        logger.info("OpenAI response received. Tokens used: %s", tokens_used)
 
-        return ChatResponse(
+        # Server-generated fields are trusted, so skip re-validation and
+        # hand the payload straight to orjson
+        payload = ChatResponse.model_construct(
             response=assistant_message,
             model=response.model,
             tokens_used=tokens_used,
             finish_reason=finish_reason
         )
+        return ORJSONResponse(content=payload.model_dump())
 
-    except RateLimitError as e:
-        logger.error(f"Rate limit exceeded: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="OpenAI API rate limit exceeded. Please try again later."
-        )
+    except OpenAIError as e:
+        raise openai_http_exception(e)
 
-    except APIConnectionError as e:
-        logger.error(f"API connection error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Unable to connect to OpenAI API. Please try again later."
-        )
 
-    except APIError as e:
-        logger.error(f"OpenAI API error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"OpenAI API error: {str(e)}"
-        )
+@app.post(
+    "/chat/stream",
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream of response deltas"},
+        429: {"model": ErrorResponse, "description": "Rate Limit Exceeded"},
+        503: {"model": ErrorResponse, "description": "Service Unavailable"},
+    },
+    tags=["Chat"]
+)
+async def chat_completion_stream(
+    request: ChatRequest,
+    client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Stream a chat completion as Server-Sent Events.
+
+    Each event carries a JSON object with the next content delta
+    (`data: {"delta": "..."}`); the stream ends with `data: [DONE]`.
+
+    Args:
+        request: ChatRequest containing the user message and optional parameters
+
+    Returns:
+        StreamingResponse emitting `text/event-stream` events
+
+    Raises:
+        HTTPException: If the OpenAI request fails before streaming starts
+    """
+    logger.info("Received streaming chat request with message: %s...", request.message[:50])
 
+    try:
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(openai_call_slot(request.max_tokens))
+            stream = await client.chat.completions.create(
+                model=settings.openai_model,
+                messages=[
+                    {"role": "system", "content": request.system_prompt},
+                    {"role": "user", "content": request.message}
+                ],
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                stream=True
+            )
+            # The call returns once headers arrive, so the slot is handed to
+            # the stream and held until generation ends
+            slot = stack.pop_all()
     except OpenAIError as e:
-        logger.error(f"OpenAI error: {str(e)}")
+        raise openai_http_exception(e)
+
+    async def close_stream(error: Optional[OpenAIError] = None):
+        """
+        Close the OpenAI stream and release its slot; repeated calls do nothing.
+
+        The error that ended the stream, if any, is passed to the slot as if
+        raised inside it, so a rate limit backs off the token bucket and a
+        failure does not count as a success.
+        """
+        await stream.close()
+        if error is None:
+            await slot.aclose()
+        else:
+            await slot.__aexit__(type(error), error, error.__traceback__)
+
+    async def event_stream():
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield f"data: {orjson.dumps({'delta': delta}).decode()}\n\n"
+            yield "data: [DONE]\n\n"
+        except OpenAIError as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error("OpenAI stream error: %s", e)
+            await close_stream(e)
+            yield f"event: error\ndata: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+        finally:
+            # Runs when the stream is exhausted or the client disconnects
+            await close_stream()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Cleans up if the client disconnected before the stream started
+        background=BackgroundTask(close_stream)
+    )
+
+
+@app.post(
+    "/chat/batch",
+    response_model=BatchChatResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+    tags=["Chat"]
+)
+async def chat_completion_batch(
+    request: BatchChatRequest,
+    client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Generate chat completions for several messages concurrently.
+
+    Messages are dispatched in parallel (bounded by OPENAI_BATCH_CONCURRENCY)
+    and a failure for one message does not fail the whole batch.
+
+    Args:
+        request: BatchChatRequest containing the user messages and shared parameters
+
+    Returns:
+        BatchChatResponse with one result per message, in request order
+    """
+    logger.info("Received batch chat request with %s messages", len(request.messages))
+    semaphore = asyncio.Semaphore(settings.openai_batch_concurrency)
+    model = settings.openai_model
+
+    async def complete(message: str):
+        async with semaphore:
+            return await create_chat_completion(
+                client,
+                model=model,
+                messages=[
+                    {"role": "system", "content": request.system_prompt},
+                    {"role": "user", "content": message}
+                ],
+                temperature=request.temperature,
+                max_tokens=request.max_tokens
+            )
+
+    responses = await asyncio.gather(
+        *(complete(message) for message in request.messages),
+        return_exceptions=True
+    )
+
+    results = []
+    total_tokens = 0
+    for response in responses:
+        if isinstance(response, OpenAIError):
+            logger.error("Batch item failed: %s", response)
+            results.append(BatchChatItem.model_construct(response=None, error=str(response)))
+            continue
+        if isinstance(response, BaseException):
+            raise response
+
+        tokens_used = response.usage.total_tokens
+        total_tokens += tokens_used
+        results.append(BatchChatItem.model_construct(
+            response=ChatResponse.model_construct(
+                response=response.choices[0].message.content,
+                model=response.model,
+                tokens_used=tokens_used,
+                finish_reason=response.choices[0].finish_reason
+            ),
+            error=None
+        ))
+
+    logger.info("Batch completed. Tokens used: %s", total_tokens)
+    payload = BatchChatResponse.model_construct(results=results, tokens_used=total_tokens)
+    return ORJSONResponse(content=payload.model_dump())
+
+
+def _to_batch_status(batch) -> AsyncBatchStatus:
+    """Convert an OpenAI batch object to an AsyncBatchStatus."""
+    counts = batch.request_counts
+    return AsyncBatchStatus.model_construct(
+        batch_id=batch.id,
+        status=batch.status,
+        total=counts.total if counts else 0,
+        completed=counts.completed if counts else 0,
+        failed=counts.failed if counts else 0,
+        output_file_id=batch.output_file_id
+    )
+
+
+@app.post(
+    "/chat/batch/async",
+    response_model=AsyncBatchStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        429: {"model": ErrorResponse, "description": "Rate Limit Exceeded"},
+        502: {"model": ErrorResponse, "description": "OpenAI API Error"},
+        503: {"model": ErrorResponse, "description": "Service Unavailable"},
+    },
+    tags=["Chat"]
+)
+async def create_async_batch(
+    request: AsyncBatchRequest,
+    client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Submit chat requests to the OpenAI Batch API.
+
+    Batches cost half as much as regular completions but complete within
+    24 hours, so this suits latency-tolerant bulk work. Poll
+    `GET /chat/batch/{batch_id}` for progress.
+
+    Args:
+        request: AsyncBatchRequest containing the chat requests
+
+    Returns:
+        AsyncBatchStatus of the created batch
+
+    Raises:
+        HTTPException: If uploading the requests or creating the batch fails
+    """
+    logger.info("Received async batch request with %s messages", len(request.messages))
+    model = settings.openai_model
+
+    # One chat completion request per JSONL line, matched back by custom_id
+    lines = b"\n".join(
+        orjson.dumps({
+            "custom_id": f"request-{index}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": chat_request.system_prompt},
+                    {"role": "user", "content": chat_request.message}
+                ],
+                "temperature": chat_request.temperature,
+                "max_tokens": chat_request.max_tokens
+            }
+        })
+        for index, chat_request in enumerate(request.messages)
+    )
+
+    try:
+        batch_file = await client.files.create(file=("batch.jsonl", lines), purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+    except OpenAIError as e:
+        raise openai_http_exception(e)
+
+    logger.info("Created OpenAI batch %s", batch.id)
+    return ORJSONResponse(
+        content=_to_batch_status(batch).model_dump(),
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+async def _retrieve_batch(client: AsyncOpenAI, batch_id: str):
+    """
+    Retrieve an OpenAI batch, mapping OpenAI errors to HTTP errors.
+
+    Raises:
+        HTTPException: If the batch does not exist or OpenAI cannot be reached
+    """
+    try:
+        return await client.batches.retrieve(batch_id)
+    except NotFoundError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"OpenAI error: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Batch '{batch_id}' not found"
         )
+    except OpenAIError as e:
+        raise openai_http_exception(e)
 
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+
+@app.get(
+    "/chat/batch/{batch_id}",
+    response_model=AsyncBatchStatus,
+    responses={
+        404: {"model": ErrorResponse, "description": "Batch Not Found"},
+    },
+    tags=["Chat"]
+)
+async def get_async_batch(batch_id: str, client: AsyncOpenAI = Depends(get_openai_client)):
+    """
+    Get the status of a batch submitted with `POST /chat/batch/async`.
+
+    Args:
+        batch_id: OpenAI batch identifier
+
+    Returns:
+        AsyncBatchStatus with the batch progress
+    """
+    batch = await _retrieve_batch(client, batch_id)
+    return ORJSONResponse(content=_to_batch_status(batch).model_dump())
+
+
+@app.get(
+    "/chat/batch/{batch_id}/results",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "OpenAI Batch API output, one JSON result per line"},
+        404: {"model": ErrorResponse, "description": "Batch Not Found"},
+        409: {"model": ErrorResponse, "description": "Batch Not Completed"},
+    },
+    tags=["Chat"]
+)
+async def get_async_batch_results(batch_id: str, client: AsyncOpenAI = Depends(get_openai_client)):
+    """
+    Stream the results of a completed batch.
+
+    The OpenAI output file is relayed as it is downloaded; each line holds
+    the `custom_id` (`request-<index>`) and response of one chat request.
+
+    Args:
+        batch_id: OpenAI batch identifier
+
+    Returns:
+        StreamingResponse emitting the batch output as JSON lines
+
+    Raises:
+        HTTPException: If the batch does not exist or has no output yet
+    """
+    batch = await _retrieve_batch(client, batch_id)
+    if not batch.output_file_id:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="An unexpected error occurred. Please try again later."
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Batch '{batch_id}' has no results yet (status: {batch.status})"
         )
 
+    async def stream_output():
+        async with client.files.with_streaming_response.content(batch.output_file_id) as response:
+            async for chunk in response.iter_bytes():
+                yield chunk
+
+    return StreamingResponse(stream_output(), media_type="application/x-ndjson")
+
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """
     Global exception handler for unhandled exceptions.
     """
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"error": "Internal server error", "detail": str(exc)}
     )
@@ -191,6 +612,10 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level=settings.log_level.lower()
+        # uvicorn ignores workers when reload is enabled
+        workers=int(os.getenv("WEB_CONCURRENCY", settings.workers)),
+        reload=settings.reload,
+        log_level=settings.log_level.lower(),
+        loop="uvloop",
+        http="httptools"
     )
@@ -1,8 +1,8 @@
 """
 Pydantic models for request/response validation.
 """
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, List
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 
 
 class Message(BaseModel):
@@ -13,7 +13,10 @@ class Message(BaseModel):
 
 class ChatRequest(BaseModel):
     """Request model for chat completion."""
-    message: str = Field(..., min_length=1, max_length=4000, description="User message to send to the AI")
+    message: Annotated[str, StringConstraints(min_length=1, max_length=4000)] = Field(
+        ...,
+        description="User message to send to the AI"
+    )
     system_prompt: Optional[str] = Field(
         default="You are a helpful assistant.",
         description="System prompt to guide AI behavior"
@@ -31,8 +34,10 @@ class ChatRequest(BaseModel):
         description="Maximum tokens to generate"
     )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "message": "What is FastAPI?",
                 "system_prompt": "You are a helpful assistant.",
@@ -40,6 +45,7 @@ class ChatRequest(BaseModel):
                 "max_tokens": 500
             }
         }
+    )
 
 
 class ChatResponse(BaseModel):
@@ -49,8 +55,8 @@ class ChatResponse(BaseModel):
     tokens_used: int = Field(..., description="Total tokens used in the request")
     finish_reason: str = Field(..., description="Reason the generation finished")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "response": "FastAPI is a modern, fast web framework for building APIs with Python.",
                 "model": "gpt-3.5-turbo",
@@ -58,6 +64,125 @@ class ChatResponse(BaseModel):
                 "finish_reason": "stop"
             }
         }
+    )
+
+
+class BatchChatRequest(BaseModel):
+    """Request model for a batch of chat completions sharing the same parameters."""
+    messages: List[Annotated[str, StringConstraints(min_length=1, max_length=4000)]] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="User messages to send to the AI (1-100 messages)"
+    )
+    system_prompt: Optional[str] = Field(
+        default="You are a helpful assistant.",
+        description="System prompt to guide AI behavior"
+    )
+    temperature: Optional[float] = Field(
+        default=0.7,
+        ge=0.0,
+        le=2.0,
+        description="Sampling temperature (0-2)"
+    )
+    max_tokens: Optional[int] = Field(
+        default=500,
+        ge=1,
+        le=4000,
+        description="Maximum tokens to generate per message"
+    )
+
+    model_config = ConfigDict(
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
+            "example": {
+                "messages": ["What is FastAPI?", "What is Pydantic?"],
+                "system_prompt": "You are a helpful assistant.",
+                "temperature": 0.7,
+                "max_tokens": 500
+            }
+        }
+    )
+
+
+class BatchChatItem(BaseModel):
+    """Result for a single message in a batch; exactly one of response/error is set."""
+    response: Optional[ChatResponse] = Field(None, description="Chat completion for the message")
+    error: Optional[str] = Field(None, description="Error message if the completion failed")
+
+
+class BatchChatResponse(BaseModel):
+    """Response model for batch chat completion."""
+    results: List[BatchChatItem] = Field(..., description="Results in the same order as the request messages")
+    tokens_used: int = Field(..., description="Total tokens used across successful completions")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "results": [
+                    {
+                        "response": {
+                            "response": "FastAPI is a modern, fast web framework for building APIs with Python.",
+                            "model": "gpt-3.5-turbo",
+                            "tokens_used": 45,
+                            "finish_reason": "stop"
+                        },
+                        "error": None
+                    },
+                    {
+                        "response": None,
+                        "error": "OpenAI API rate limit exceeded"
+                    }
+                ],
+                "tokens_used": 45
+            }
+        }
+    )
+
+
+class AsyncBatchRequest(BaseModel):
+    """Request model for chat completions processed by the OpenAI Batch API."""
+    messages: List[ChatRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=50000,
+        description="Chat requests to process asynchronously (1-50000 requests)"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "messages": [
+                    {"message": "What is FastAPI?", "max_tokens": 200},
+                    {"message": "What is Pydantic?", "temperature": 0.2}
+                ]
+            }
+        }
+    )
+
+
+class AsyncBatchStatus(BaseModel):
+    """Status of a chat completion batch submitted to the OpenAI Batch API."""
+    batch_id: str = Field(..., description="OpenAI batch identifier")
+    status: str = Field(..., description="Batch status (validating, in_progress, completed, failed, ...)")
+    total: int = Field(0, description="Number of requests in the batch")
+    completed: int = Field(0, description="Number of completed requests")
+    failed: int = Field(0, description="Number of failed requests")
+    output_file_id: Optional[str] = Field(None, description="OpenAI file with the results, once completed")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "batch_id": "batch_abc123",
+                "status": "completed",
+                "total": 2,
+                "completed": 2,
+                "failed": 0,
+                "output_file_id": "file-xyz789"
+            }
+        }
+    )
 
 
 class HealthResponse(BaseModel):
@@ -65,13 +190,14 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Service status")
     version: str = Field(..., description="API version")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "healthy",
                 "version": "1.0.0"
             }
         }
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -79,10 +205,11 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "error": "Invalid API key",
                 "detail": "The provided OpenAI API key is invalid or expired"
             }
         }
+    )
@@ -0,0 +1,55 @@
+"""
+Client-side rate limiting for OpenAI API calls.
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket that smooths bursts to a target request rate.
+
+    The refill rate is lowered when OpenAI reports a rate limit and
+    recovers gradually on successful calls (additive increase,
+    multiplicative decrease).
+    """
+
+    def __init__(self, rate: float, capacity: float, min_rate: float = 0.1):
+        """
+        Initialize the token bucket.
+
+        Args:
+            rate: Refill rate in tokens (requests) per second
+            capacity: Maximum number of tokens the bucket can hold (burst size)
+            min_rate: Lower bound for the refill rate after decay
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add the tokens accrued since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def decay(self, factor: float = 0.5):
+        """Reduce the refill rate after a rate limit error."""
+        self.rate = max(self.min_rate, self.rate * factor)
+
+    def recover(self, step_fraction: float = 0.05):
+        """Increase the refill rate towards its configured maximum after a success."""
+        self.rate = min(self.max_rate, self.rate + self.max_rate * step_fraction)
@@ -1,20 +1,33 @@
 """
 Unit tests for the FastAPI application.
 """
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from openai.types.chat import ChatCompletion, ChatCompletionMessage
 from openai.types.chat.chat_completion import Choice
 from openai.types.completion_usage import CompletionUsage
 
-from app.main import app
+from app.main import app, get_openai_client, prewarm_openai_connection, settings
+from app.rate_limiter import TokenBucket
 
 
 @pytest.fixture
 def client():
-    """Create a test client."""
-    return TestClient(app)
+    """Create a test client with the application lifespan running, without contacting OpenAI."""
+    with patch.object(settings, "openai_prewarm", False), TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def mock_client():
+    """Replace the OpenAI client dependency with a mock."""
+    mock = Mock()
+    app.dependency_overrides[get_openai_client] = lambda: mock
+    yield mock
+    app.dependency_overrides.clear()
 
 
 @pytest.fixture
@@ -61,11 +74,10 @@ def test_root_endpoint(client):
     assert "version" in data
 
 
-@patch('app.main.openai_client')
 def test_chat_completion_success(mock_client, client, mock_openai_response):
     """Test successful chat completion."""
     # Setup mock
-    mock_client.chat.completions.create.return_value = mock_openai_response
+    mock_client.chat.completions.create = AsyncMock(return_value=mock_openai_response)
 
     # Make request
     request_data = {
@@ -95,17 +107,22 @@ def test_chat_completion_invalid_request(client):
     assert response.status_code == 422  # Validation error
 
 
-@patch('app.main.openai_client')
+def test_chat_completion_whitespace_message(client):
+    """Test chat completion rejects a message that is only whitespace."""
+    response = client.post("/chat", json={"message": "   "})
+    assert response.status_code == 422
+
+
 def test_chat_completion_openai_error(mock_client, client):
     """Test chat completion with OpenAI API error."""
     from openai import APIError
 
     # Setup mock to raise error
-    mock_client.chat.completions.create.side_effect = APIError(
+    mock_client.chat.completions.create = AsyncMock(side_effect=APIError(
         message="Test API error",
         request=Mock(),
         body={}
-    )
+    ))
 
     # Make request
     request_data = {
@@ -115,3 +132,255 @@ def test_chat_completion_openai_error(mock_client, client):
 
     # Should return 502 for API errors
     assert response.status_code == 502
+
+
+def test_chat_completion_timeout_maps_to_service_unavailable(mock_client, client):
+    """Test that OpenAI error subclasses map through their base error type."""
+    from openai import APITimeoutError
+
+    mock_client.chat.completions.create = AsyncMock(side_effect=APITimeoutError(request=Mock()))
+
+    response = client.post("/chat", json={"message": "What is FastAPI?"})
+
+    assert response.status_code == 503
+
+
+def test_chat_completion_batch(mock_client, client, mock_openai_response):
+    """Test batch chat completion with a partial failure."""
+    from openai import APIError
+
+    mock_client.chat.completions.create = AsyncMock(side_effect=[
+        mock_openai_response,
+        APIError(message="Test API error", request=Mock(), body={}),
+        mock_openai_response,
+    ])
+
+    request_data = {
+        "messages": ["What is FastAPI?", "What is Pydantic?", "What is httpx?"]
+    }
+    response = client.post("/chat/batch", json=request_data)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["results"]) == 3
+    assert data["results"][0]["response"]["response"] == "This is a test response from OpenAI."
+    assert data["results"][1]["response"] is None
+    assert "Test API error" in data["results"][1]["error"]
+    assert data["tokens_used"] == 60
+    assert mock_client.chat.completions.create.await_count == 3
+
+
+def test_chat_completion_batch_empty(client):
+    """Test batch chat completion rejects an empty message list."""
+    response = client.post("/chat/batch", json={"messages": []})
+    assert response.status_code == 422
+
+
+def test_token_bucket_decay_and_recover():
+    """Test the token bucket backs off on rate limits and recovers on success."""
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    asyncio.run(bucket.acquire())
+    asyncio.run(bucket.acquire())
+    assert bucket.tokens < 1
+
+    bucket.decay()
+    assert bucket.rate == 5
+    bucket.recover(step_fraction=0.5)
+    bucket.recover(step_fraction=0.5)
+    assert bucket.rate == 10
+
+
+def test_chat_completion_rate_limit_decays_bucket(mock_client, client):
+    """Test that a rate limit error returns 429 and slows the token bucket."""
+    from openai import RateLimitError
+    from app.main import openai_bucket
+
+    mock_client.chat.completions.create = AsyncMock(side_effect=RateLimitError(
+        message="Rate limit reached",
+        response=Mock(status_code=429, headers={}),
+        body={}
+    ))
+    rate_before = openai_bucket.rate
+
+    response = client.post("/chat", json={"message": "What is FastAPI?"})
+
+    assert response.status_code == 429
+    assert openai_bucket.rate < rate_before
+    openai_bucket.rate = openai_bucket.max_rate
+
+
+def test_prewarm_lists_models():
+    """Test that pre-warming makes a single models.list call without retries."""
+    openai_client = Mock()
+    prewarm_client = openai_client.with_options.return_value
+    prewarm_client.models.list = AsyncMock()
+
+    asyncio.run(prewarm_openai_connection(openai_client))
+
+    openai_client.with_options.assert_called_once_with(max_retries=0, timeout=5)
+    prewarm_client.models.list.assert_awaited_once()
+
+
+def test_startup_prewarms_when_enabled():
+    """Test that the lifespan pre-warms the OpenAI connection when OPENAI_PREWARM is set."""
+    with patch.object(settings, "openai_prewarm", True), \
+            patch("app.main.prewarm_openai_connection", new_callable=AsyncMock) as mock_prewarm:
+        with TestClient(app):
+            pass
+
+    mock_prewarm.assert_awaited_once()
+
+
+class FakeChatStream:
+    """Async iterable of chat completion chunks standing in for an OpenAI AsyncStream."""
+
+    def __init__(self, texts, on_chunk=None, error=None):
+        self.texts = texts
+        self.on_chunk = on_chunk
+        self.error = error
+        self.closed = False
+
+    async def __aiter__(self):
+        for text in self.texts:
+            if self.on_chunk is not None:
+                self.on_chunk()
+            chunk = Mock()
+            chunk.choices = [Mock(delta=Mock(content=text))]
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        self.closed = True
+
+
+def test_chat_completion_stream(mock_client, client):
+    """Test streaming chat completion emits SSE deltas and a terminator."""
+    stream = FakeChatStream(["Fast", "API", None])
+    mock_client.chat.completions.create = AsyncMock(return_value=stream)
+
+    response = client.post("/chat/stream", json={"message": "What is FastAPI?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line for line in response.text.split("\n\n") if line]
+    assert events == ['data: {"delta":"Fast"}', 'data: {"delta":"API"}', "data: [DONE]"]
+    assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+    assert stream.closed
+
+
+def test_chat_completion_stream_holds_slot_until_done(mock_client, client):
+    """Test that a streamed generation keeps its concurrency slot until the stream ends."""
+    from app.main import LONG_SEM
+
+    free_slots = LONG_SEM._value
+    free_slots_while_streaming = []
+    stream = FakeChatStream(["Fast", "API"], on_chunk=lambda: free_slots_while_streaming.append(LONG_SEM._value))
+    mock_client.chat.completions.create = AsyncMock(return_value=stream)
+
+    response = client.post("/chat/stream", json={"message": "What is FastAPI?", "max_tokens": 1000})
+
+    assert response.status_code == 200
+    assert free_slots_while_streaming == [free_slots - 1, free_slots - 1]
+    assert LONG_SEM._value == free_slots
+    assert stream.closed
+
+
+def test_chat_completion_stream_rate_limited_midway(mock_client, client):
+    """Test that a rate limit during a stream is reported in-band and backs off the token bucket."""
+    import httpx
+    from openai import RateLimitError
+    from app.main import LONG_SEM, openai_bucket
+
+    free_slots = LONG_SEM._value
+    error = RateLimitError(
+        "Rate limit reached",
+        response=httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions")),
+        body=None
+    )
+    stream = FakeChatStream(["Fast"], error=error)
+    mock_client.chat.completions.create = AsyncMock(return_value=stream)
+
+    with patch.object(openai_bucket, "decay") as mock_decay, \
+            patch.object(openai_bucket, "recover") as mock_recover:
+        response = client.post("/chat/stream", json={"message": "What is FastAPI?", "max_tokens": 1000})
+
+    assert response.status_code == 200
+    events = [line for line in response.text.split("\n\n") if line]
+    assert events[0] == 'data: {"delta":"Fast"}'
+    assert events[1].startswith("event: error\n")
+    mock_decay.assert_called_once()
+    mock_recover.assert_not_called()
+    assert LONG_SEM._value == free_slots
+    assert stream.closed
+
+
+def test_chat_completion_stream_cleanup_without_streaming(mock_client):
+    """Test that the response's background task closes the stream and slot if the stream never ran."""
+    from app.main import LONG_SEM, chat_completion_stream
+    from app.models import ChatRequest
+
+    free_slots = LONG_SEM._value
+    stream = FakeChatStream(["Fast"])
+    mock_client.chat.completions.create = AsyncMock(return_value=stream)
+
+    async def respond_without_streaming():
+        response = await chat_completion_stream(
+            ChatRequest(message="What is FastAPI?", max_tokens=1000),
+            client=mock_client,
+            settings=settings
+        )
+        held_slots = LONG_SEM._value
+        await response.background()
+        return held_slots
+
+    assert asyncio.run(respond_without_streaming()) == free_slots - 1
+    assert LONG_SEM._value == free_slots
+    assert stream.closed
+
+
+def test_create_async_batch(mock_client, client):
+    """Test submitting chat requests to the OpenAI Batch API."""
+    mock_client.files.create = AsyncMock(return_value=Mock(id="file-123"))
+    mock_client.batches.create = AsyncMock(return_value=Mock(
+        id="batch_123",
+        status="validating",
+        request_counts=None,
+        output_file_id=None
+    ))
+
+    request_data = {
+        "messages": [{"message": "What is FastAPI?"}, {"message": "What is Pydantic?"}]
+    }
+    response = client.post("/chat/batch/async", json=request_data)
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["batch_id"] == "batch_123"
+    assert data["status"] == "validating"
+
+    _, upload = mock_client.files.create.await_args.kwargs["file"]
+    assert len(upload.splitlines()) == 2
+    mock_client.batches.create.assert_awaited_once_with(
+        input_file_id="file-123",
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+
+
+def test_get_async_batch_results_not_ready(mock_client, client):
+    """Test batch results are refused until the batch has an output file."""
+    mock_client.batches.retrieve = AsyncMock(return_value=Mock(
+        id="batch_123",
+        status="in_progress",
+        request_counts=Mock(total=2, completed=1, failed=0),
+        output_file_id=None
+    ))
+
+    response = client.get("/chat/batch/batch_123")
+    assert response.status_code == 200
+    assert response.json()["completed"] == 1
+
+    response = client.get("/chat/batch/batch_123/results")
+    assert response.status_code == 409
@@ -2,17 +2,37 @@
 LangChain chatbot implementation with conversation memory.
 """
 import logging
-from typing import Dict
+from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import tiktoken
+from openai import AsyncOpenAI
 from langchain_openai import ChatOpenAI
-from langchain.chains import ConversationChain
+from langchain.memory import ConversationBufferMemory
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import BaseMessage
 
 from app.config import get_settings
+from app.models import ChatMessage
 from app.session_manager import get_session_manager
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache()
+def get_encoder(model: str) -> tiktoken.Encoding:
+    """
+    Get the cached tiktoken encoder for a model.
+    Building an encoder loads its BPE ranks, so it is done once per model.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
 class LangChainChatbot:
     """LangChain-powered chatbot with conversation memory."""
 
@@ -20,13 +40,31 @@ class LangChainChatbot:
         """Initialize the chatbot."""
         self.settings = get_settings()
         self.session_manager = get_session_manager()
+        # Settings read on every request are copied to plain attributes
+        self._memory_key = self.settings.memory_key
+        self._model = self.settings.openai_model
+
+        # Shared connection pool for all async LLM calls
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.settings.openai_max_connections,
+                max_keepalive_connections=self.settings.openai_max_keepalive_connections
+            )
+        )
+
+        self.openai_client = AsyncOpenAI(
+            api_key=self.settings.openai_api_key,
+            timeout=self.settings.openai_timeout,
+            http_client=self.http_client
+        )
 
         # Initialize OpenAI LLM
         self.llm = ChatOpenAI(
             model=self.settings.openai_model,
             temperature=0.7,
             openai_api_key=self.settings.openai_api_key,
-            request_timeout=self.settings.openai_timeout
+            request_timeout=self.settings.openai_timeout,
+            async_client=self.openai_client.chat.completions
         )
 
         # Define the conversation prompt template
@@ -38,7 +76,17 @@ Be conversational and maintain context from previous messages in the conversatio
             ("human", "{input}")
         ])
 
-    def chat(self, session_id: str, message: str, temperature: float = 0.7) -> Dict:
+    async def _load_history(self, memory: ConversationBufferMemory) -> List[BaseMessage]:
+        """Load a session's messages without blocking the event loop on Redis."""
+        return (await memory.aload_memory_variables({}))[self._memory_key]
+
+    async def chat(
+        self,
+        session_id: str,
+        message: str,
+        temperature: float = 0.7,
+        include_history: bool = False
+    ) -> Dict:
         """
         Process a chat message and return a response.
 
@@ -46,66 +94,146 @@ Be conversational and maintain context from previous messages in the conversatio
             session_id: Unique session identifier
             message: User's message
             temperature: Sampling temperature for the LLM
+            include_history: Whether to build the conversation history for the response
 
         Returns:
             Dictionary containing response and metadata
         """
-        logger.info(f"Processing message for session {session_id}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Processing message for session %s", session_id)
 
         # Get or create session memory
         memory = self.session_manager.get_or_create_session(session_id)
 
-        # Update LLM temperature if different
-        if temperature != self.llm.temperature:
-            self.llm.temperature = temperature
-
-        # Create conversation chain with memory
-        conversation = ConversationChain(
-            llm=self.llm,
-            memory=memory,
-            prompt=self.prompt,
-            verbose=False
+        # The memory step of a ConversationChain is synchronous, which would
+        # block the event loop on Redis, so the history is loaded and saved
+        # here. The temperature is bound per call rather than set on the
+        # shared LLM, which would leak between concurrent sessions.
+        prompt_messages = self.prompt.format_messages(
+            input=message,
+            **{self._memory_key: await self._load_history(memory)}
         )
-
-        # Get response from the chain
-        response = conversation.predict(input=message)
+        result = await self.llm.bind(temperature=temperature).ainvoke(prompt_messages)
+        response = result.content
+        await memory.asave_context({"input": message}, {"response": response})
 
         # Update session activity
         self.session_manager.update_session_activity(session_id)
 
-        # Get conversation history
-        messages = memory.chat_memory.messages
-
-        # Convert messages to dict format
-        conversation_history = [
-            {
-                "role": "user" if msg.type == "human" else "assistant",
-                "content": msg.content,
-                "timestamp": None  # LangChain messages don't have timestamps by default
-            }
-            for msg in messages
-        ]
+        # Only build the history when the caller asks for it
+        conversation_history = None
+        if include_history:
+            conversation_history = self._format_history(await self._load_history(memory))
 
-        # Estimate token usage (rough approximation)
-        total_chars = sum(len(msg["content"]) for msg in conversation_history)
-        estimated_tokens = total_chars // 4  # Rough approximation: 1 token ≈ 4 characters
+        # Keep a running token count so each turn only encodes the new messages
+        tokens_used = self._record_tokens(session_id, message, response)
 
-        logger.info(f"Response generated for session {session_id}, estimated tokens: {estimated_tokens}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Response generated for session %s, tokens: %s", session_id, tokens_used)
 
         return {
             "response": response,
             "conversation_history": conversation_history,
-            "tokens_used": estimated_tokens
+            "tokens_used": tokens_used
         }
 
+    async def chat_stream(self, session_id: str, message: str, temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        Stream a chat response chunk by chunk.
+
+        The assembled response is saved to the session memory only once the
+        stream completes, so an interrupted stream leaves the history unchanged.
+
+        Args:
+            session_id: Unique session identifier
+            message: User's message
+            temperature: Sampling temperature for the LLM
 
-# Global chatbot instance
-_chatbot: LangChainChatbot = None
+        Yields:
+            Response content deltas as they are generated
+        """
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Streaming message for session %s", session_id)
 
+        memory = self.session_manager.get_or_create_session(session_id)
+        prompt_messages = self.prompt.format_messages(
+            input=message,
+            **{self._memory_key: await self._load_history(memory)}
+        )
 
-def get_chatbot() -> LangChainChatbot:
-    """Get the global chatbot instance."""
-    global _chatbot
-    if _chatbot is None:
-        _chatbot = LangChainChatbot()
-    return _chatbot
+        chunks = []
+        async for chunk in self.llm.bind(temperature=temperature).astream(prompt_messages):
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+
+        response = "".join(chunks)
+        await memory.asave_context({"input": message}, {"response": response})
+        self.session_manager.update_session_activity(session_id)
+        self._record_tokens(session_id, message, response)
+
+    async def get_conversation_history(self, session_id: str) -> Optional[List[ChatMessage]]:
+        """
+        Get the conversation history of a session.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            List of ChatMessage objects, or None if the session does not exist
+        """
+        memory = self.session_manager.get_session_memory(session_id)
+        if memory is None:
+            return None
+        return self._format_history(await self._load_history(memory))
+
+    @staticmethod
+    def _format_history(messages) -> List[ChatMessage]:
+        """Convert LangChain messages to ChatMessage objects."""
+        # LangChain messages don't carry timestamps, so stamp them with a single now
+        now = datetime.utcnow()
+        return [
+            ChatMessage.model_construct(
+                role="user" if msg.type == "human" else "assistant",
+                content=msg.content,
+                timestamp=msg.additional_kwargs.get("timestamp") or now
+            )
+            for msg in messages
+        ]
+
+    def _record_tokens(self, session_id: str, message: str, response: str) -> int:
+        """Add the tokens of a user/assistant exchange to the session total and return it."""
+        encoder = get_encoder(self._model)
+        tokens = len(encoder.encode(message)) + len(encoder.encode(response))
+        return self.session_manager.add_session_tokens(session_id, tokens)
+
+    def load_encoder(self):
+        """
+        Load the tiktoken encoder for the configured model before serving traffic.
+
+        The first chat then only runs the native BPE encoder instead of also
+        loading its merge ranks. Failures are logged and the encoder is loaded
+        on first use instead.
+        """
+        try:
+            get_encoder(self.settings.openai_model)
+            logger.info("Token encoder loaded for model %s", self.settings.openai_model)
+        except Exception as e:
+            logger.warning("Failed to preload token encoder: %s", e)
+
+    async def prewarm(self):
+        """
+        Open a keep-alive connection to the OpenAI API before serving traffic.
+
+        The first chat then reuses a pooled connection instead of paying for
+        the TCP and TLS handshakes. Failures are logged and otherwise ignored.
+        """
+        try:
+            await self.openai_client.with_options(max_retries=0, timeout=5).models.list()
+            logger.info("OpenAI connection pre-warmed")
+        except Exception as e:
+            logger.warning("Failed to pre-warm OpenAI connection: %s", e)
+
+    async def close(self):
+        """Close the shared HTTP connection pool."""
+        await self.http_client.aclose()
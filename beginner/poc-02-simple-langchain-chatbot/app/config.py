@@ -3,6 +3,7 @@ Configuration management for the LangChain chatbot.
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -17,6 +18,9 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-3.5-turbo"
     openai_timeout: int = 30
+    openai_max_connections: int = 200
+    openai_max_keepalive_connections: int = 100
+    openai_prewarm: bool = True
 
     # LangChain Configuration
     max_token_limit: int = 4000
@@ -26,12 +30,19 @@ class Settings(BaseSettings):
     session_timeout_minutes: int = 30
     max_sessions: int = 100
 
+    # Redis (optional): share conversation memory between workers
+    redis_url: Optional[str] = None
+    redis_max_connections: int = 100
+
     # Application Configuration
     log_level: str = "INFO"
+    workers: int = 1
+    reload: bool = False
 
     class Config:
         env_file = ".env"
         case_sensitive = False
+        frozen = True
 
 
 @lru_cache()
@@ -2,32 +2,44 @@
 Main FastAPI application for LangChain chatbot.
 POC 2: Simple LangChain Chatbot
 """
+import asyncio
 import logging
+import os
+import queue
 from contextlib import asynccontextmanager
-from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from app.config import get_settings
 from app.models import (
     ChatRequest,
     ChatResponse,
-    ChatMessage,
+    ConversationHistoryResponse,
     ClearSessionRequest,
     ClearSessionResponse,
     SessionInfo,
     HealthResponse,
     ErrorResponse
 )
-from app.chatbot import get_chatbot
-from app.session_manager import get_session_manager
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from app.chatbot import LangChainChatbot
+from app.session_manager import SessionManager, get_session_manager
+
+# Configure logging: request handlers only enqueue records, a background
+# listener thread formats them and writes to stderr
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 )
+log_listener = QueueListener(log_queue, log_handler)
+queue_handler = QueueHandler(log_queue)
+# Without its own formatter, basicConfig would give the queue handler the
+# default "LEVEL:name:message" format, which the listener then wraps again
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
 logger = logging.getLogger(__name__)
 
 
@@ -35,22 +47,57 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
     # Startup
+    log_listener.start()
     logger.info("Initializing LangChain chatbot...")
     try:
         # Initialize chatbot (this also initializes session manager)
-        chatbot = get_chatbot()
+        app.state.settings = get_settings()
+        app.state.chatbot = LangChainChatbot()
         logger.info("LangChain chatbot initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize chatbot: {str(e)}")
+        logger.error("Failed to initialize chatbot: %s", e)
         raise
 
+    app.state.chatbot.load_encoder()
+
+    # Only active_sessions changes between health probes
+    app.state.health = {"status": "healthy", "version": app.state.settings.api_version}
+
+    if app.state.settings.openai_prewarm:
+        await app.state.chatbot.prewarm()
+
+    cleanup_task = asyncio.create_task(
+        _cleanup_sessions_periodically(
+            get_session_manager(),
+            interval=app.state.settings.session_timeout_minutes * 60 / 4
+        )
+    )
+
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
-    session_manager = get_session_manager()
-    session_manager.clear_all_sessions()
+    cleanup_task.cancel()
+    await app.state.chatbot.close()
+    get_session_manager().clear_all_sessions()
+    get_session_manager().close()
     logger.info("All sessions cleared")
+    log_listener.stop()
+
+
+async def _cleanup_sessions_periodically(session_manager: SessionManager, interval: float):
+    """Remove expired sessions every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            session_manager.cleanup_expired_sessions()
+        except Exception as e:
+            logger.error("Session cleanup failed: %s", e)
+
+
+def get_chatbot(request: Request) -> LangChainChatbot:
+    """Get the chatbot instance created during application startup."""
+    return request.app.state.chatbot
 
 
 # Initialize FastAPI app
@@ -59,30 +106,33 @@ app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description=settings.api_description,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 
+def _health_response(request: Request, session_manager: SessionManager) -> Response:
+    """Serialize the startup health payload with the current session count."""
+    body = {**request.app.state.health, "active_sessions": session_manager.get_active_session_count()}
+    return Response(content=orjson.dumps(body), media_type="application/json")
+
+
 @app.get("/", response_model=HealthResponse, tags=["Health"])
-async def root():
+async def root(
+    request: Request,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
     """Root endpoint - health check."""
-    session_manager = get_session_manager()
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version,
-        active_sessions=session_manager.get_active_session_count()
-    )
+    return _health_response(request, session_manager)
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+async def health_check(
+    request: Request,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
     """Health check endpoint to verify service is running."""
-    session_manager = get_session_manager()
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version,
-        active_sessions=session_manager.get_active_session_count()
-    )
+    return _health_response(request, session_manager)
 
 
 @app.post(
@@ -95,7 +145,7 @@ async def health_check():
     },
     tags=["Chat"]
 )
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, chatbot: LangChainChatbot = Depends(get_chatbot)):
     """
     Send a message to the chatbot and receive a response.
     Maintains conversation history per session.
@@ -104,49 +154,88 @@ async def chat(request: ChatRequest):
         request: ChatRequest containing session_id and message
 
     Returns:
-        ChatResponse with assistant's response and conversation history
+        ChatResponse with assistant's response, and the conversation history
+        when include_history is set
 
     Raises:
         HTTPException: On processing errors
     """
     try:
-        logger.info(f"Chat request for session: {request.session_id}")
-
-        # Get chatbot instance
-        chatbot = get_chatbot()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Chat request for session: %s", request.session_id)
 
         # Process the message
-        result = chatbot.chat(
+        result = await chatbot.chat(
             session_id=request.session_id,
             message=request.message,
-            temperature=request.temperature
+            temperature=request.temperature,
+            include_history=request.include_history
         )
 
-        # Convert history to ChatMessage objects with timestamps
-        conversation_history = [
-            ChatMessage(
-                role=msg["role"],
-                content=msg["content"],
-                timestamp=msg.get("timestamp") or datetime.utcnow()
-            )
-            for msg in result["conversation_history"]
-        ]
-
-        return ChatResponse(
+        # Response fields come from the chatbot, so skip re-validation and
+        # hand the payload straight to orjson
+        payload = ChatResponse.model_construct(
             session_id=request.session_id,
             message=result["response"],
-            conversation_history=conversation_history,
+            conversation_history=result["conversation_history"],
             tokens_used=result["tokens_used"]
         )
+        return ORJSONResponse(content=payload.model_dump())
 
     except Exception as e:
-        logger.error(f"Error processing chat request: {str(e)}", exc_info=True)
+        logger.error("Error processing chat request: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process chat request: {str(e)}"
         )
 
 
+@app.post(
+    "/chat/stream",
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream of response deltas"},
+    },
+    tags=["Chat"]
+)
+async def chat_stream(request: ChatRequest, chatbot: LangChainChatbot = Depends(get_chatbot)):
+    """
+    Send a message to the chatbot and stream the response as Server-Sent Events.
+
+    Each event carries a JSON object with the next content delta
+    (`data: {"delta": "..."}`); the stream ends with `data: [DONE]`.
+    The full response is added to the session history when the stream completes.
+
+    Args:
+        request: ChatRequest containing session_id and message
+
+    Returns:
+        StreamingResponse emitting `text/event-stream` events
+    """
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Streaming chat request for session: %s", request.session_id)
+
+    async def event_stream():
+        try:
+            async for delta in chatbot.chat_stream(
+                session_id=request.session_id,
+                message=request.message,
+                temperature=request.temperature
+            ):
+                yield f"data: {orjson.dumps({'delta': delta}).decode()}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error("Error streaming chat response: %s", e, exc_info=True)
+            yield f"event: error\ndata: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get(
     "/session/{session_id}",
     response_model=SessionInfo,
@@ -155,7 +244,10 @@ async def chat(request: ChatRequest):
     },
     tags=["Session Management"]
 )
-async def get_session(session_id: str):
+async def get_session(
+    session_id: str,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
     """
     Get information about a specific session.
 
@@ -163,12 +255,11 @@ async def get_session(session_id: str):
         session_id: Session identifier
 
     Returns:
-        SessionInfo with session details
+        SessionInfo with session details, serialized without re-validation
 
     Raises:
         HTTPException: If session not found
     """
-    session_manager = get_session_manager()
     session_info = session_manager.get_session_info(session_id)
 
     if session_info is None:
@@ -177,7 +268,45 @@ async def get_session(session_id: str):
             detail=f"Session '{session_id}' not found"
         )
 
-    return session_info
+    return ORJSONResponse(content=session_info)
+
+
+@app.get(
+    "/session/{session_id}/history",
+    response_model=ConversationHistoryResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Session Not Found"},
+    },
+    tags=["Session Management"]
+)
+async def get_session_history(
+    session_id: str,
+    chatbot: LangChainChatbot = Depends(get_chatbot)
+):
+    """
+    Get the conversation history of a specific session.
+
+    Args:
+        session_id: Session identifier
+
+    Returns:
+        ConversationHistoryResponse with the session's messages
+
+    Raises:
+        HTTPException: If session not found
+    """
+    history = await chatbot.get_conversation_history(session_id)
+
+    if history is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session '{session_id}' not found"
+        )
+
+    return ConversationHistoryResponse.model_construct(
+        session_id=session_id,
+        conversation_history=history
+    )
 
 
 @app.post(
@@ -188,7 +317,10 @@ async def get_session(session_id: str):
     },
     tags=["Session Management"]
 )
-async def clear_session(request: ClearSessionRequest):
+async def clear_session(
+    request: ClearSessionRequest,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
     """
     Clear a specific session and its conversation history.
 
@@ -201,8 +333,7 @@ async def clear_session(request: ClearSessionRequest):
     Raises:
         HTTPException: If session not found
     """
-    session_manager = get_session_manager()
-    success = session_manager.clear_session(request.session_id)
+    success = await session_manager.clear_session(request.session_id)
 
     if not success:
         raise HTTPException(
@@ -210,7 +341,7 @@ async def clear_session(request: ClearSessionRequest):
             detail=f"Session '{request.session_id}' not found"
         )
 
-    logger.info(f"Session cleared: {request.session_id}")
+    logger.info("Session cleared: %s", request.session_id)
     return ClearSessionResponse(
         session_id=request.session_id,
         message="Session cleared successfully"
@@ -220,8 +351,8 @@ async def clear_session(request: ClearSessionRequest):
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled exceptions."""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"error": "Internal server error", "detail": str(exc)}
     )
@@ -233,6 +364,10 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level=settings.log_level.lower()
+        # uvicorn ignores workers when reload is enabled
+        workers=int(os.getenv("WEB_CONCURRENCY", settings.workers)),
+        reload=settings.reload,
+        log_level=settings.log_level.lower(),
+        loop="uvloop",
+        http="httptools"
     )
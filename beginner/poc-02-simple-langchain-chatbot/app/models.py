@@ -1,8 +1,8 @@
 """
 Pydantic models for chatbot request/response validation.
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 from datetime import datetime
 
 
@@ -15,34 +15,51 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     """Request model for chat."""
-    session_id: str = Field(..., min_length=1, max_length=100, description="Unique session identifier")
-    message: str = Field(..., min_length=1, max_length=4000, description="User message")
+    session_id: Annotated[str, StringConstraints(min_length=1, max_length=100)] = Field(
+        ...,
+        description="Unique session identifier"
+    )
+    message: Annotated[str, StringConstraints(min_length=1, max_length=4000)] = Field(
+        ...,
+        description="User message"
+    )
     temperature: Optional[float] = Field(
         default=0.7,
         ge=0.0,
         le=2.0,
         description="Sampling temperature"
     )
+    include_history: Optional[bool] = Field(
+        default=False,
+        description="Include the full conversation history in the response"
+    )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "session_id": "user-123-session-1",
                 "message": "Hello, what can you help me with?",
-                "temperature": 0.7
+                "temperature": 0.7,
+                "include_history": False
             }
         }
+    )
 
 
 class ChatResponse(BaseModel):
     """Response model for chat."""
     session_id: str = Field(..., description="Session identifier")
     message: str = Field(..., description="Assistant's response")
-    conversation_history: List[ChatMessage] = Field(..., description="Full conversation history")
+    conversation_history: Optional[List[ChatMessage]] = Field(
+        None,
+        description="Full conversation history (only when include_history is set)"
+    )
     tokens_used: int = Field(..., description="Tokens used in this interaction")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "session_id": "user-123-session-1",
                 "message": "I'm a helpful assistant. I can answer questions, help with tasks, and have conversations!",
@@ -61,6 +78,33 @@ class ChatResponse(BaseModel):
                 "tokens_used": 45
             }
         }
+    )
+
+
+class ConversationHistoryResponse(BaseModel):
+    """Conversation history of a session."""
+    session_id: str = Field(..., description="Session identifier")
+    conversation_history: List[ChatMessage] = Field(..., description="Full conversation history")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "session_id": "user-123-session-1",
+                "conversation_history": [
+                    {
+                        "role": "user",
+                        "content": "Hello, what can you help me with?",
+                        "timestamp": "2024-01-01T12:00:00"
+                    },
+                    {
+                        "role": "assistant",
+                        "content": "I'm a helpful assistant...",
+                        "timestamp": "2024-01-01T12:00:01"
+                    }
+                ]
+            }
+        }
+    )
 
 
 class SessionInfo(BaseModel):
@@ -70,8 +114,8 @@ class SessionInfo(BaseModel):
     created_at: datetime = Field(..., description="Session creation time")
     last_activity: datetime = Field(..., description="Last activity time")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "session_id": "user-123-session-1",
                 "message_count": 10,
@@ -79,18 +123,25 @@ class SessionInfo(BaseModel):
                 "last_activity": "2024-01-01T12:30:00"
             }
         }
+    )
 
 
 class ClearSessionRequest(BaseModel):
     """Request to clear a session."""
-    session_id: str = Field(..., min_length=1, max_length=100, description="Session identifier to clear")
+    session_id: Annotated[str, StringConstraints(min_length=1, max_length=100)] = Field(
+        ...,
+        description="Session identifier to clear"
+    )
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "session_id": "user-123-session-1"
             }
         }
+    )
 
 
 class ClearSessionResponse(BaseModel):
@@ -98,13 +149,14 @@ class ClearSessionResponse(BaseModel):
     session_id: str = Field(..., description="Cleared session identifier")
     message: str = Field(..., description="Confirmation message")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "session_id": "user-123-session-1",
                 "message": "Session cleared successfully"
             }
         }
+    )
 
 
 class HealthResponse(BaseModel):
@@ -113,14 +165,15 @@ class HealthResponse(BaseModel):
     version: str = Field(..., description="API version")
     active_sessions: int = Field(..., description="Number of active sessions")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "healthy",
                 "version": "1.0.0",
                 "active_sessions": 5
             }
         }
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -128,10 +181,11 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "error": "Session not found",
                 "detail": "The specified session ID does not exist"
             }
         }
+    )
@@ -1,64 +1,242 @@
 """
 Session manager for handling conversation memory.
 """
+import asyncio
+import json
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
 from langchain.memory import ConversationBufferMemory
-from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_community.chat_message_histories import ChatMessageHistory, RedisChatMessageHistory
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, message_to_dict, messages_from_dict
 
 from app.config import get_settings
-from app.models import SessionInfo
 
 logger = logging.getLogger(__name__)
 
+REDIS_KEY_PREFIX = "message_store:"
+
+
+class PooledRedisChatMessageHistory(RedisChatMessageHistory):
+    """
+    Redis chat history that shares one connection pool across sessions.
+
+    Reads and appends each take a single round trip: both are pipelined
+    together with the key's TTL refresh, so active sessions do not expire.
+    """
+
+    def __init__(self, session_id: str, redis_client, ttl: Optional[int] = None):
+        # The parent constructor opens a new client per session, so set the
+        # attributes directly and reuse the shared client instead
+        self.redis_client = redis_client
+        self.session_id = session_id
+        self.key_prefix = REDIS_KEY_PREFIX
+        self.ttl = ttl
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore[override]
+        """Retrieve the messages from Redis, oldest first."""
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.lrange(self.key, 0, -1)
+            if self.ttl:
+                pipe.expire(self.key, self.ttl)
+            items = pipe.execute()[0]
+        # Messages are pushed to the head of the list, so reverse them
+        return messages_from_dict([json.loads(item) for item in reversed(items)])
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Append a single message to the record in Redis."""
+        self.add_messages([message])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append messages to the record in Redis in one transaction."""
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.lpush(self.key, *[json.dumps(message_to_dict(message)) for message in messages])
+            if self.ttl:
+                pipe.expire(self.key, self.ttl)
+            pipe.execute()
+
+
+class ConversationTurnMemory(ConversationBufferMemory):
+    """
+    Conversation buffer memory that stores each user/assistant turn in one write.
+
+    The async methods run Redis-backed reads and writes in a worker thread,
+    so they do not block the event loop; in-process history is used directly.
+    """
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Save context from this conversation to buffer."""
+        input_str, output_str = self._get_input_output(inputs, outputs)
+        self.chat_memory.add_messages([HumanMessage(content=input_str), AIMessage(content=output_str)])
+
+    async def aload_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the history, reading Redis off the event loop."""
+        if isinstance(self.chat_memory, RedisChatMessageHistory):
+            return await asyncio.to_thread(self.load_memory_variables, inputs)
+        return self.load_memory_variables(inputs)
+
+    async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Save a turn, writing to Redis off the event loop."""
+        if isinstance(self.chat_memory, RedisChatMessageHistory):
+            await asyncio.to_thread(self.save_context, inputs, outputs)
+        else:
+            self.save_context(inputs, outputs)
+
+
+class _SessionEntry:
+    """State of a single chat session."""
+
+    __slots__ = ("memory", "created_at", "last_activity", "message_count", "token_count")
+
+    def __init__(self, memory: ConversationBufferMemory, now: float):
+        self.memory = memory
+        self.reset(now)
+
+    def reset(self, now: float):
+        """Reset the timestamps and counters for a new session."""
+        self.created_at = now
+        self.last_activity = now
+        self.message_count = 0
+        self.token_count = 0
+
 
 class SessionManager:
     """Manages chat sessions and their memory."""
 
+    __slots__ = (
+        "sessions",
+        "_memory_key",
+        "_max_sessions",
+        "_timeout_seconds",
+        "_epoch_wall",
+        "_epoch_mono",
+        "_session_pool",
+        "_session_pool_size",
+        "redis_client",
+    )
+
     def __init__(self):
         """Initialize session manager."""
-        self.sessions: Dict[str, dict] = {}
-        self.settings = get_settings()
+        # Ordered from least to most recently active, so expired sessions
+        # are always at the front
+        self.sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        # Settings used on every request are copied to plain attributes
+        settings = get_settings()
+        self._memory_key = settings.memory_key
+        self._max_sessions = settings.max_sessions
+        self._timeout_seconds = settings.session_timeout_minutes * 60
+
+        # Session timestamps are time.monotonic() values; this pair converts
+        # them back to wall-clock time for session info
+        self._epoch_wall = datetime.utcnow()
+        self._epoch_mono = time.monotonic()
+
+        # Expired session entries are recycled, together with their memory,
+        # instead of allocating new ones for every new session
+        self._session_pool: List[_SessionEntry] = []
+        self._session_pool_size = self._max_sessions // 4
+
+        # With Redis configured, conversation memory is shared by all workers
+        self.redis_client = None
+        if settings.redis_url:
+            import redis
+
+            self.redis_client = redis.Redis(
+                connection_pool=redis.BlockingConnectionPool.from_url(
+                    settings.redis_url,
+                    max_connections=settings.redis_max_connections
+                )
+            )
+
+    def _create_chat_history(self, session_id: str) -> BaseChatMessageHistory:
+        """Create the message store for a session's memory."""
+        if self.redis_client is None:
+            return ChatMessageHistory()
+        return PooledRedisChatMessageHistory(
+            session_id,
+            self.redis_client,
+            ttl=self._timeout_seconds
+        )
 
     def get_or_create_session(self, session_id: str) -> ConversationBufferMemory:
         """
-        Get existing session memory or create a new one.
+        Get existing session memory or create a new session.
 
         Args:
             session_id: Unique session identifier
 
         Returns:
-            ConversationBufferMemory instance for the session
+            The session's ConversationBufferMemory
         """
-        self._cleanup_old_sessions()
-
-        if session_id not in self.sessions:
-            logger.info(f"Creating new session: {session_id}")
-            memory = ConversationBufferMemory(
-                memory_key=self.settings.memory_key,
-                return_messages=True,
-                chat_memory=ChatMessageHistory()
-            )
-            self.sessions[session_id] = {
-                "memory": memory,
-                "created_at": datetime.utcnow(),
-                "last_activity": datetime.utcnow(),
-                "message_count": 0
-            }
+        now = time.monotonic()
+        session = self.sessions.get(session_id)
+        if session is None:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Creating new session: %s", session_id)
+            self._evict_lru_sessions(now)
+            if self._session_pool:
+                session = self._session_pool.pop()
+                session.reset(now)
+            else:
+                memory = ConversationTurnMemory(
+                    memory_key=self._memory_key,
+                    return_messages=True,
+                    chat_memory=self._create_chat_history(session_id)
+                )
+                session = _SessionEntry(memory, now)
+            self.sessions[session_id] = session
         else:
-            logger.info(f"Using existing session: {session_id}")
-            self.sessions[session_id]["last_activity"] = datetime.utcnow()
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Using existing session: %s", session_id)
+            session.last_activity = now
+            self.sessions.move_to_end(session_id)
 
-        return self.sessions[session_id]["memory"]
+        return session.memory
+
+    def get_session_memory(self, session_id: str) -> Optional[ConversationBufferMemory]:
+        """
+        Get the memory of an existing session without creating or touching it.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            ConversationBufferMemory if session exists, None otherwise
+        """
+        session = self.sessions.get(session_id)
+        return None if session is None else session.memory
 
     def update_session_activity(self, session_id: str):
         """Update the last activity timestamp for a session."""
-        if session_id in self.sessions:
-            self.sessions[session_id]["last_activity"] = datetime.utcnow()
-            self.sessions[session_id]["message_count"] += 1
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_activity = time.monotonic()
+            session.message_count += 1
+            self.sessions.move_to_end(session_id)
+
+    def add_session_tokens(self, session_id: str, tokens: int) -> int:
+        """
+        Add to the running token count of a session.
+
+        Args:
+            session_id: Session identifier
+            tokens: Number of tokens to add
+
+        Returns:
+            The session's total token count
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return tokens
+        session.token_count += tokens
+        return session.token_count
 
-    def clear_session(self, session_id: str) -> bool:
+    async def clear_session(self, session_id: str) -> bool:
         """
         Clear a specific session.
 
@@ -68,13 +246,16 @@ class SessionManager:
         Returns:
             True if session was cleared, False if not found
         """
-        if session_id in self.sessions:
-            logger.info(f"Clearing session: {session_id}")
-            del self.sessions[session_id]
-            return True
-        return False
+        cleared = self.sessions.pop(session_id, None) is not None
+        if cleared:
+            logger.info("Clearing session: %s", session_id)
+        if self.redis_client is not None:
+            # The session may only have been used by another worker
+            deleted = await asyncio.to_thread(self.redis_client.delete, REDIS_KEY_PREFIX + session_id)
+            cleared = bool(deleted) or cleared
+        return cleared
 
-    def get_session_info(self, session_id: str) -> Optional[SessionInfo]:
+    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
         """
         Get information about a specific session.
 
@@ -82,52 +263,94 @@ class SessionManager:
             session_id: Session identifier
 
         Returns:
-            SessionInfo if session exists, None otherwise
+            Dict with the SessionInfo fields if session exists, None otherwise
         """
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return None
 
-        session = self.sessions[session_id]
-        return SessionInfo(
-            session_id=session_id,
-            message_count=session["message_count"],
-            created_at=session["created_at"],
-            last_activity=session["last_activity"]
-        )
+        return {
+            "session_id": session_id,
+            "message_count": session.message_count,
+            "created_at": self._to_wall_clock(session.created_at),
+            "last_activity": self._to_wall_clock(session.last_activity)
+        }
+
+    def _to_wall_clock(self, timestamp: float) -> datetime:
+        """Convert a monotonic session timestamp to a UTC datetime."""
+        return self._epoch_wall + timedelta(seconds=timestamp - self._epoch_mono)
 
     def get_active_session_count(self) -> int:
         """Get the count of active sessions."""
         return len(self.sessions)
 
-    def _cleanup_old_sessions(self):
-        """Clean up sessions that have exceeded the timeout."""
-        if len(self.sessions) >= self.settings.max_sessions:
-            current_time = datetime.utcnow()
-            timeout_delta = timedelta(minutes=self.settings.session_timeout_minutes)
+    def cleanup_expired_sessions(self):
+        """
+        Clean up sessions that have exceeded the timeout.
+
+        Runs periodically in the background rather than on every request.
+        Sessions are kept in activity order, so only the expired prefix is
+        visited instead of every session.
+        """
+        current_time = time.monotonic()
 
-            expired_sessions = [
-                session_id
-                for session_id, session_data in self.sessions.items()
-                if current_time - session_data["last_activity"] > timeout_delta
-            ]
+        while self.sessions:
+            session_id, session_data = next(iter(self.sessions.items()))
+            if current_time - session_data.last_activity <= self._timeout_seconds:
+                break
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Removing expired session: %s", session_id)
+            self.sessions.popitem(last=False)
+            self._recycle_session(session_data)
 
-            for session_id in expired_sessions:
-                logger.info(f"Removing expired session: {session_id}")
-                del self.sessions[session_id]
+    def _evict_lru_sessions(self, now: float):
+        """
+        Evict least recently active sessions until there is room for a new one.
+
+        Sessions that have expired since the last cleanup are recycled; live
+        ones may still be in use, so they are dropped instead (see
+        _recycle_session). Redis-backed history outlives the eviction and is
+        reloaded if the session returns.
+        """
+        while len(self.sessions) >= self._max_sessions:
+            session_id, session_data = self.sessions.popitem(last=False)
+            if now - session_data.last_activity > self._timeout_seconds:
+                self._recycle_session(session_data)
+            elif logger.isEnabledFor(logging.INFO):
+                logger.info("Evicting least recently used session: %s", session_id)
+
+    def _recycle_session(self, session: _SessionEntry):
+        """
+        Return an expired session entry to the pool for reuse.
+
+        Only expired sessions are recycled: an explicitly cleared session may
+        still be in use by an in-flight request, which must not write into
+        another session's memory. Redis-backed memory is bound to its session
+        id and is never recycled.
+        """
+        if self.redis_client is not None or len(self._session_pool) >= self._session_pool_size:
+            return
+        session.memory.clear()
+        self._session_pool.append(session)
 
     def clear_all_sessions(self):
         """Clear all sessions (useful for testing)."""
         logger.info("Clearing all sessions")
         self.sessions.clear()
 
-
-# Global session manager instance
-_session_manager: Optional[SessionManager] = None
+    def close(self):
+        """Close the Redis connection pool, if any."""
+        if self.redis_client is not None:
+            self.redis_client.connection_pool.disconnect()
 
 
+@lru_cache(maxsize=1)
 def get_session_manager() -> SessionManager:
-    """Get the global session manager instance."""
-    global _session_manager
-    if _session_manager is None:
-        _session_manager = SessionManager()
-    return _session_manager
+    """
+    Get the global session manager instance.
+
+    The instance is process-wide on purpose. A ContextVar would not work
+    here: each request runs in a copy of the context, so a manager set
+    during one request would be invisible to the next one.
+    """
+    return SessionManager()
@@ -1,24 +1,34 @@
 """
 Unit tests for the LangChain chatbot application.
 """
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch, MagicMock
 
+from app.config import get_settings
 from app.main import app
+from app.models import ChatMessage
 from app.session_manager import get_session_manager
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client():
-    """Create a test client."""
-    return TestClient(app)
+    """Create a test client shared by the module, running the application lifespan once."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="module")
+def session_manager():
+    """Get the global session manager."""
+    return get_session_manager()
 
 
 @pytest.fixture(autouse=True)
-def clear_sessions():
+def clear_sessions(session_manager):
     """Clear all sessions before and after each test."""
-    session_manager = get_session_manager()
     session_manager.clear_all_sessions()
     yield
     session_manager.clear_all_sessions()
@@ -30,16 +40,16 @@ def mock_chatbot_response():
     return {
         "response": "Hello! I'm a helpful AI assistant. How can I help you today?",
         "conversation_history": [
-            {
-                "role": "user",
-                "content": "Hello",
-                "timestamp": None
-            },
-            {
-                "role": "assistant",
-                "content": "Hello! I'm a helpful AI assistant. How can I help you today?",
-                "timestamp": None
-            }
+            ChatMessage(
+                role="user",
+                content="Hello",
+                timestamp=datetime.utcnow()
+            ),
+            ChatMessage(
+                role="assistant",
+                content="Hello! I'm a helpful AI assistant. How can I help you today?",
+                timestamp=datetime.utcnow()
+            )
         ],
         "tokens_used": 25
     }
@@ -76,7 +86,8 @@ def test_chat_success(mock_chat, client, mock_chatbot_response):
     request_data = {
         "session_id": "test-session-1",
         "message": "Hello",
-        "temperature": 0.7
+        "temperature": 0.7,
+        "include_history": True
     }
     response = client.post("/chat", json=request_data)
 
@@ -87,6 +98,41 @@ def test_chat_success(mock_chat, client, mock_chatbot_response):
     assert data["message"] == "Hello! I'm a helpful AI assistant. How can I help you today?"
     assert len(data["conversation_history"]) == 2
     assert data["tokens_used"] == 25
+    assert mock_chat.call_args[1]["include_history"] is True
+
+
+@patch('app.chatbot.LangChainChatbot.chat')
+def test_chat_omits_history_by_default(mock_chat, client, mock_chatbot_response):
+    """Test that conversation history is only returned when requested."""
+    mock_chat.return_value = {**mock_chatbot_response, "conversation_history": None}
+
+    response = client.post("/chat", json={
+        "session_id": "test-session-no-history",
+        "message": "Hello"
+    })
+
+    assert response.status_code == 200
+    assert response.json()["conversation_history"] is None
+    assert mock_chat.call_args[1]["include_history"] is False
+
+
+@patch('app.chatbot.LangChainChatbot.get_conversation_history')
+def test_get_session_history(mock_history, client, mock_chatbot_response):
+    """Test fetching a session's conversation history on demand."""
+    mock_history.return_value = mock_chatbot_response["conversation_history"]
+
+    response = client.get("/session/test-session-history/history")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["session_id"] == "test-session-history"
+    assert [msg["role"] for msg in data["conversation_history"]] == ["user", "assistant"]
+
+
+def test_get_session_history_not_found(client):
+    """Test fetching history for a non-existent session."""
+    response = client.get("/session/nonexistent-session/history")
+    assert response.status_code == 404
 
 
 @patch('app.chatbot.LangChainChatbot.chat')
@@ -212,3 +258,103 @@ def test_temperature_parameter(mock_chat, client, mock_chatbot_response):
     mock_chat.assert_called_once()
     call_args = mock_chat.call_args
     assert call_args[1]["temperature"] == 1.5
+
+
+@patch('app.chatbot.LangChainChatbot.chat_stream')
+def test_chat_stream(mock_chat_stream, client):
+    """Test streaming chat emits SSE deltas and a terminator."""
+    async def fake_stream(**kwargs):
+        for delta in ["Hello", "!"]:
+            yield delta
+
+    mock_chat_stream.side_effect = fake_stream
+
+    response = client.post("/chat/stream", json={
+        "session_id": "test-stream",
+        "message": "Hello"
+    })
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line for line in response.text.split("\n\n") if line]
+    assert events == ['data: {"delta":"Hello"}', 'data: {"delta":"!"}', "data: [DONE]"]
+
+
+def test_session_limit_evicts_least_recently_used(session_manager):
+    """Test that creating a session at the limit evicts the least recently used one."""
+    max_sessions = get_settings().max_sessions
+    for i in range(max_sessions):
+        session_manager.get_or_create_session(f"session-{i}")
+    session_manager.update_session_activity("session-0")
+
+    session_manager.get_or_create_session("session-new")
+
+    assert session_manager.get_active_session_count() == max_sessions
+    assert session_manager.get_session_memory("session-0") is not None
+    assert session_manager.get_session_memory("session-1") is None
+
+
+def test_pooled_redis_history_round_trip():
+    """Test that Redis history keeps message order and refreshes the TTL on reads and appends."""
+    import fakeredis
+    from langchain_core.messages import AIMessage, HumanMessage
+    from app.session_manager import REDIS_KEY_PREFIX, PooledRedisChatMessageHistory
+
+    redis_client = fakeredis.FakeRedis()
+    history = PooledRedisChatMessageHistory("redis-session", redis_client, ttl=60)
+
+    history.add_messages([HumanMessage(content="Hello"), AIMessage(content="Hi!")])
+    history.add_message(HumanMessage(content="How are you?"))
+
+    assert [(m.type, m.content) for m in history.messages] == [
+        ("human", "Hello"), ("ai", "Hi!"), ("human", "How are you?")
+    ]
+    redis_client.persist(REDIS_KEY_PREFIX + "redis-session")
+    history.messages
+    assert 0 < redis_client.ttl(REDIS_KEY_PREFIX + "redis-session") <= 60
+
+
+def test_redis_session_memory_and_clear():
+    """Test that Redis-backed sessions save turns through the async memory API and clear the stored history."""
+    import asyncio
+    import fakeredis
+    from app.session_manager import REDIS_KEY_PREFIX, SessionManager
+
+    manager = SessionManager()
+    manager.redis_client = fakeredis.FakeRedis()
+    memory = manager.get_or_create_session("redis-session")
+
+    async def chat_turn():
+        await memory.asave_context({"input": "Hello"}, {"response": "Hi!"})
+        return await memory.aload_memory_variables({})
+
+    history = asyncio.run(chat_turn())[get_settings().memory_key]
+    assert [m.content for m in history] == ["Hello", "Hi!"]
+    assert manager.redis_client.llen(REDIS_KEY_PREFIX + "redis-session") == 2
+
+    # Another worker's session is cleared from Redis too
+    manager.sessions.clear()
+    assert asyncio.run(manager.clear_session("redis-session")) is True
+    assert not manager.redis_client.exists(REDIS_KEY_PREFIX + "redis-session")
+
+
+def test_chat_saves_turn_to_session_memory(client, session_manager):
+    """Test that chat sends the session history to the LLM and saves the new turn."""
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    chatbot = client.app.state.chatbot
+    bound_llm = Mock()
+    bound_llm.ainvoke = AsyncMock(side_effect=[Mock(content="Hi!"), Mock(content="Fine, thanks.")])
+
+    # Token counting downloads the tiktoken encoding, which is not under test
+    with patch.object(chatbot, "llm", Mock(bind=Mock(return_value=bound_llm))), \
+            patch.object(chatbot, "_record_tokens", return_value=0):
+        asyncio.run(chatbot.chat("memory-session", "Hello"))
+        result = asyncio.run(chatbot.chat("memory-session", "How are you?", include_history=True))
+
+    assert result["response"] == "Fine, thanks."
+    assert [m.content for m in result["conversation_history"]] == ["Hello", "Hi!", "How are you?", "Fine, thanks."]
+    # The second prompt holds the system message, the first turn and the new message
+    prompt_messages = bound_llm.ainvoke.call_args.args[0]
+    assert [m.content for m in prompt_messages[1:]] == ["Hello", "Hi!", "How are you?"]
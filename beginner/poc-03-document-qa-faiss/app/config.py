@@ -17,7 +17,11 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-3.5-turbo"
     openai_embedding_model: str = "text-embedding-ada-002"
+    openai_embedding_batch_size: int = 1000
     openai_timeout: int = 30
+    # Send a throwaway embeddings and chat request on startup so the first
+    # question does not pay for connection setup and tokenizer loading
+    openai_warmup: bool = False
 
     # Document Processing Configuration
     chunk_size: int = 1000
@@ -25,10 +29,30 @@ class Settings(BaseSettings):
 
     # FAISS Configuration
     vector_store_path: str = "./vector_store"
+    # Saving rewrites the whole index, so adds are saved every N adds or
+    # every interval instead of individually
+    vector_store_save_every: int = 64
+    vector_store_save_interval_seconds: float = 5.0
+    # Index used once the store reaches faiss_quantize_threshold vectors
+    faiss_index_factory: str = "IVF1024,SQ8"
+    faiss_quantize_threshold: int = 40000
+    faiss_nprobe: int = 8
+    # Memory-map saved quantized indexes on load (shared between workers);
+    # saves replace the index files, so existing mappings stay valid
+    faiss_mmap: bool = False
+    # Requires faiss-gpu in place of faiss-cpu
+    faiss_use_gpu: bool = False
+
+    # Upload Batching Configuration
+    upload_batch_window_ms: int = 50
+    upload_batch_max_chunks: int = 1000
 
     # Retrieval Configuration
     default_top_k: int = 3
     similarity_threshold: float = 0.7
+    query_embedding_cache_size: int = 4096
+    answer_cache_size: int = 1024
+    answer_cache_ttl_seconds: int = 300
 
     # Application Configuration
     log_level: str = "INFO"
@@ -36,6 +60,7 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = False
+        frozen = True
 
 
 @lru_cache()
@@ -2,7 +2,8 @@
 Document processing utilities for chunking and loading documents.
 """
 import logging
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
@@ -11,42 +12,71 @@ from app.config import get_settings
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """
+    Get a cached text splitter for the given chunk parameters.
+    Splitters are shared by every processor using the same parameters.
+    """
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+
+
 class DocumentProcessor:
     """Handles document loading and chunking."""
 
     def __init__(self):
         """Initialize document processor."""
-        self.settings = get_settings()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.settings.chunk_size,
-            chunk_overlap=self.settings.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-
-    def process_text(self, content: str, metadata: dict = None) -> List[Document]:
+        settings = get_settings()
+        self._chunk_size = settings.chunk_size
+        self._chunk_overlap = settings.chunk_overlap
+        self.text_splitter = _get_splitter(self._chunk_size, self._chunk_overlap)
+
+    def process_text(
+        self,
+        content: str,
+        metadata: dict = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None
+    ) -> List[Document]:
         """
         Process text content into chunks.
 
         Args:
             content: Text content to process
-            metadata: Optional metadata to attach to chunks
+            metadata: Optional metadata to attach to chunks (shared by all chunks)
+            chunk_size: Optional chunk size overriding the configured one
+            chunk_overlap: Optional chunk overlap overriding the configured one
 
         Returns:
             List of Document objects with chunks
         """
-        logger.info(f"Processing text of length {len(content)}")
-
-        # Create initial document
-        doc = Document(
-            page_content=content,
-            metadata=metadata or {}
-        )
-
-        # Split into chunks
-        chunks = self.text_splitter.split_documents([doc])
-
-        logger.info(f"Created {len(chunks)} chunks from document")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Processing text of length %s", len(content))
+
+        text_splitter = self.text_splitter
+        if chunk_size is not None or chunk_overlap is not None:
+            text_splitter = _get_splitter(
+                chunk_size if chunk_size is not None else self._chunk_size,
+                chunk_overlap if chunk_overlap is not None else self._chunk_overlap
+            )
+
+        # Split the raw text and wrap each chunk directly instead of using
+        # split_documents, which deep-copies the metadata for every chunk.
+        # All chunks share one shallow copy of the metadata, so per-chunk
+        # metadata must not be mutated in place.
+        metadata = dict(metadata) if metadata else {}
+        chunks = [
+            Document(page_content=text, metadata=metadata)
+            for text in text_splitter.split_text(content)
+        ]
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Created %s chunks from document", len(chunks))
         return chunks
 
     def process_documents(self, documents: List[tuple]) -> List[Document]:
@@ -60,21 +90,16 @@ class DocumentProcessor:
             List of Document chunks
         """
         all_chunks = []
+        all_chunks_extend = all_chunks.extend
         for content, metadata in documents:
-            chunks = self.process_text(content, metadata)
-            all_chunks.extend(chunks)
+            all_chunks_extend(self.process_text(content, metadata))
 
-        logger.info(f"Processed {len(documents)} documents into {len(all_chunks)} chunks")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Processed %s documents into %s chunks", len(documents), len(all_chunks))
         return all_chunks
 
 
-# Global processor instance
-_processor: DocumentProcessor = None
-
-
+@lru_cache(maxsize=1)
 def get_document_processor() -> DocumentProcessor:
     """Get the global document processor instance."""
-    global _processor
-    if _processor is None:
-        _processor = DocumentProcessor()
-    return _processor
+    return DocumentProcessor()
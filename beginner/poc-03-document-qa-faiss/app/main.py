@@ -2,11 +2,13 @@
 Main FastAPI application for Document QA system.
 POC 3: Document QA with FAISS
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
 
 from app.config import get_settings
 from app.models import (
@@ -14,14 +16,16 @@ from app.models import (
     DocumentUploadResponse,
     QuestionRequest,
     QuestionResponse,
-    SourceDocument,
+    BatchQuestionRequest,
+    BatchQuestionResponse,
     VectorStoreInfo,
     HealthResponse,
     ErrorResponse
 )
 from app.document_processor import get_document_processor
-from app.vectorstore_manager import get_vectorstore_manager
+from app.vectorstore_manager import VectorStoreManager, get_vectorstore_manager
 from app.qa_chain import get_qa_chain
+from app.upload_batcher import UploadBatcher
 
 # Configure logging
 logging.basicConfig(
@@ -40,53 +44,90 @@ async def lifespan(app: FastAPI):
         # Initialize components (loads existing vectorstore if available)
         vectorstore_manager = get_vectorstore_manager()
         qa_chain = get_qa_chain()
-        logger.info(f"Vectorstore initialized: {vectorstore_manager.is_initialized()}")
+        logger.info("Vectorstore initialized: %s", vectorstore_manager.is_initialized())
         logger.info("Document QA system initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize system: {str(e)}")
+        logger.error("Failed to initialize system: %s", e)
         raise
 
+    app.state.upload_batcher = UploadBatcher(
+        vectorstore_manager,
+        window_ms=settings.upload_batch_window_ms,
+        max_chunks=settings.upload_batch_max_chunks
+    )
+    app.state.upload_batcher.start()
+    flush_task = asyncio.create_task(
+        _flush_vectorstore_periodically(vectorstore_manager, settings.vector_store_save_interval_seconds)
+    )
+    # Runs in the background so startup does not wait on OpenAI
+    warmup_task = asyncio.create_task(qa_chain.warmup()) if settings.openai_warmup else None
+
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
-    # Save vectorstore on shutdown
-    vectorstore_manager = get_vectorstore_manager()
-    if vectorstore_manager.is_initialized():
-        vectorstore_manager.save()
+    flush_task.cancel()
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await app.state.upload_batcher.stop()
+    # Save unsaved documents on shutdown
+    get_vectorstore_manager().flush()
     logger.info("Application shutdown complete")
 
 
+async def _flush_vectorstore_periodically(vectorstore_manager: VectorStoreManager, interval: float):
+    """Save documents added since the last save every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Saving writes the whole index, so keep it off the event loop
+            await asyncio.to_thread(vectorstore_manager.flush)
+        except Exception as e:
+            logger.error("Vectorstore save failed: %s", e)
+
+
 # Initialize FastAPI app
 settings = get_settings()
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description=settings.api_description,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 
+# Health payloads only differ by vectorstore state, so both are serialized once
+_HEALTH_INITIALIZED = orjson.dumps(
+    HealthResponse(status="healthy", version=settings.api_version, vectorstore_initialized=True).model_dump()
+)
+_HEALTH_EMPTY = orjson.dumps(
+    HealthResponse(status="healthy", version=settings.api_version, vectorstore_initialized=False).model_dump()
+)
+
+
+def _health_response() -> Response:
+    """
+    Return the pre-serialized health payload for the current vectorstore state.
+
+    The health handlers stay `async def` on purpose: FastAPI runs plain `def`
+    endpoints through the threadpool, which costs far more per probe than
+    awaiting a coroutine that never suspends.
+    """
+    body = _HEALTH_INITIALIZED if get_vectorstore_manager().is_initialized() else _HEALTH_EMPTY
+    return Response(content=body, media_type="application/json")
+
+
 @app.get("/", response_model=HealthResponse, tags=["Health"])
 async def root():
     """Root endpoint - health check."""
-    vectorstore_manager = get_vectorstore_manager()
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version,
-        vectorstore_initialized=vectorstore_manager.is_initialized()
-    )
+    return _health_response()
 
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """Health check endpoint to verify service is running."""
-    vectorstore_manager = get_vectorstore_manager()
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version,
-        vectorstore_initialized=vectorstore_manager.is_initialized()
-    )
+    return _health_response()
 
 
 @app.post(
@@ -99,10 +140,11 @@ async def health_check():
     },
     tags=["Documents"]
 )
-async def upload_document(document: DocumentUpload):
+async def upload_document(document: DocumentUpload, request: Request):
     """
     Upload and process a document.
-    The document will be split into chunks and added to the vector store.
+    The document will be split into chunks and added to the vector store,
+    batched with other uploads arriving at the same time.
 
     Args:
         document: DocumentUpload containing content and optional metadata
@@ -127,12 +169,13 @@ async def upload_document(document: DocumentUpload):
         )
 
         # Add to vectorstore
-        chunks_added = vectorstore_manager.add_documents(chunks)
+        chunks_added = await request.app.state.upload_batcher.add_documents(chunks)
 
         # Get updated document count
         doc_count = vectorstore_manager.get_document_count()
 
-        logger.info(f"Document uploaded: {chunks_added} chunks added, total documents: {doc_count}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Document uploaded: %s chunks added, total documents: %s", chunks_added, doc_count)
 
         return DocumentUploadResponse(
             message="Documents uploaded successfully",
@@ -141,13 +184,34 @@ async def upload_document(document: DocumentUpload):
         )
 
     except Exception as e:
-        logger.error(f"Error uploading document: {str(e)}", exc_info=True)
+        logger.error("Error uploading document: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload document: {str(e)}"
         )
 
 
+def _question_response(question: str, result: dict) -> dict:
+    """
+    Build a QuestionResponse payload from a QA chain result.
+
+    The response is built as plain dicts; the fields come straight from the
+    chain, so orjson serializes them without model validation.
+    """
+    return {
+        "question": question,
+        "answer": result["answer"],
+        "source_documents": [
+            {
+                "content": doc.page_content,
+                "metadata": doc.metadata,
+                "relevance_score": None  # FAISS returns distance, not similarity score
+            }
+            for doc in result["source_documents"]
+        ]
+    }
+
+
 @app.post(
     "/ask",
     response_model=QuestionResponse,
@@ -173,7 +237,8 @@ async def ask_question(request: QuestionRequest):
         HTTPException: If no documents are uploaded or on processing errors
     """
     try:
-        logger.info(f"Received question: {request.question}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Received question: %s", request.question)
 
         # Get QA chain
         qa_chain = get_qa_chain()
@@ -187,42 +252,91 @@ async def ask_question(request: QuestionRequest):
             )
 
         # Get answer
-        result = qa_chain.answer_question(
+        result = await qa_chain.answer_question(
             question=request.question,
             top_k=request.top_k
         )
 
-        # Format source documents
-        source_documents = [
-            SourceDocument(
-                content=doc.page_content,
-                metadata=doc.metadata,
-                relevance_score=None  # FAISS returns distance, not similarity score
-            )
-            for doc in result["source_documents"]
-        ]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Question answered with %s source documents", len(result["source_documents"]))
 
-        logger.info(f"Question answered with {len(source_documents)} source documents")
+        return ORJSONResponse(content=_question_response(request.question, result))
 
-        return QuestionResponse(
-            question=request.question,
-            answer=result["answer"],
-            source_documents=source_documents
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.error("Validation error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
+    except Exception as e:
+        logger.error("Error answering question: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to answer question: {str(e)}"
+        )
+
+
+@app.post(
+    "/ask/batch",
+    response_model=BatchQuestionResponse,
+    status_code=status.HTTP_200_OK,
+    responses={
+        400: {"model": ErrorResponse, "description": "No documents uploaded"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+    tags=["Question Answering"]
+)
+async def ask_questions(request: BatchQuestionRequest):
+    """
+    Ask several questions about the uploaded documents at once.
+    Retrieval for all questions uses one embeddings request and one vector search.
+
+    Args:
+        request: BatchQuestionRequest containing the questions and retrieval parameters
+
+    Returns:
+        BatchQuestionResponse with one answer per question, in order
+
+    Raises:
+        HTTPException: If no documents are uploaded or on processing errors
+    """
+    try:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Received batch of %s questions", len(request.questions))
+
+        if not get_vectorstore_manager().is_initialized():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No documents uploaded. Please upload documents first."
+            )
+
+        results = await get_qa_chain().answer_questions(
+            questions=request.questions,
+            top_k=request.top_k
+        )
+
+        return ORJSONResponse(content={
+            "results": [
+                _question_response(question, result)
+                for question, result in zip(request.questions, results)
+            ]
+        })
 
     except HTTPException:
         raise
     except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
+        logger.error("Validation error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     except Exception as e:
-        logger.error(f"Error answering question: {str(e)}", exc_info=True)
+        logger.error("Error answering questions: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to answer question: {str(e)}"
+            detail=f"Failed to answer questions: {str(e)}"
         )
 
 
@@ -264,7 +378,7 @@ async def clear_vectorstore():
         logger.info("Vectorstore cleared successfully")
         return {"message": "Vector store cleared successfully"}
     except Exception as e:
-        logger.error(f"Error clearing vectorstore: {str(e)}", exc_info=True)
+        logger.error("Error clearing vectorstore: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to clear vectorstore: {str(e)}"
@@ -274,8 +388,8 @@ async def clear_vectorstore():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled exceptions."""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"error": "Internal server error", "detail": str(exc)}
     )
@@ -1,8 +1,63 @@
 """
 Pydantic models for document QA system.
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# Schema examples, shared by the models below instead of rebuilt per class
+_DOCUMENT_UPLOAD_EXAMPLE = {
+    "content": "Python is a high-level programming language...",
+    "metadata": {"source": "python_docs.txt", "category": "programming"}
+}
+
+_DOCUMENT_UPLOAD_RESPONSE_EXAMPLE = {
+    "message": "Documents uploaded successfully",
+    "document_count": 5,
+    "chunks_added": 23
+}
+
+_QUESTION_REQUEST_EXAMPLE = {
+    "question": "What is Python?",
+    "top_k": 3
+}
+
+_BATCH_QUESTION_REQUEST_EXAMPLE = {
+    "questions": ["What is Python?", "Who created Python?"],
+    "top_k": 3
+}
+
+_SOURCE_DOCUMENT_EXAMPLE = {
+    "content": "Python is a high-level programming language...",
+    "metadata": {"source": "python_docs.txt"},
+    "relevance_score": 0.95
+}
+
+_QUESTION_RESPONSE_EXAMPLE = {
+    "question": "What is Python?",
+    "answer": "Python is a high-level, interpreted programming language...",
+    "source_documents": [_SOURCE_DOCUMENT_EXAMPLE]
+}
+
+_BATCH_QUESTION_RESPONSE_EXAMPLE = {
+    "results": [_QUESTION_RESPONSE_EXAMPLE]
+}
+
+_VECTOR_STORE_INFO_EXAMPLE = {
+    "document_count": 10,
+    "is_initialized": True
+}
+
+_HEALTH_RESPONSE_EXAMPLE = {
+    "status": "healthy",
+    "version": "1.0.0",
+    "vectorstore_initialized": True
+}
+
+_ERROR_RESPONSE_EXAMPLE = {
+    "error": "No documents found",
+    "detail": "Please upload documents before asking questions"
+}
 
 
 class DocumentUpload(BaseModel):
@@ -10,13 +65,7 @@ class DocumentUpload(BaseModel):
     content: str = Field(..., min_length=1, description="Document content")
     metadata: Optional[dict] = Field(default=None, description="Optional metadata for the document")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "content": "Python is a high-level programming language...",
-                "metadata": {"source": "python_docs.txt", "category": "programming"}
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _DOCUMENT_UPLOAD_EXAMPLE})
 
 
 class DocumentUploadResponse(BaseModel):
@@ -25,14 +74,7 @@ class DocumentUploadResponse(BaseModel):
     document_count: int = Field(..., description="Number of documents in the vectorstore")
     chunks_added: int = Field(..., description="Number of chunks added")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "message": "Documents uploaded successfully",
-                "document_count": 5,
-                "chunks_added": 23
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _DOCUMENT_UPLOAD_RESPONSE_EXAMPLE})
 
 
 class QuestionRequest(BaseModel):
@@ -40,13 +82,17 @@ class QuestionRequest(BaseModel):
     question: str = Field(..., min_length=1, max_length=500, description="Question to ask")
     top_k: Optional[int] = Field(default=3, ge=1, le=10, description="Number of relevant chunks to retrieve")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "What is Python?",
-                "top_k": 3
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _QUESTION_REQUEST_EXAMPLE})
+
+
+class BatchQuestionRequest(BaseModel):
+    """Request model for asking several questions at once."""
+    questions: List[Annotated[str, Field(min_length=1, max_length=500)]] = Field(
+        ..., min_length=1, max_length=20, description="Questions to ask"
+    )
+    top_k: Optional[int] = Field(default=3, ge=1, le=10, description="Number of relevant chunks to retrieve per question")
+
+    model_config = ConfigDict(json_schema_extra={"example": _BATCH_QUESTION_REQUEST_EXAMPLE})
 
 
 class SourceDocument(BaseModel):
@@ -55,14 +101,7 @@ class SourceDocument(BaseModel):
     metadata: dict = Field(default_factory=dict, description="Document metadata")
     relevance_score: Optional[float] = Field(None, description="Relevance score")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "content": "Python is a high-level programming language...",
-                "metadata": {"source": "python_docs.txt"},
-                "relevance_score": 0.95
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _SOURCE_DOCUMENT_EXAMPLE})
 
 
 class QuestionResponse(BaseModel):
@@ -71,20 +110,14 @@ class QuestionResponse(BaseModel):
     answer: str = Field(..., description="Generated answer")
     source_documents: List[SourceDocument] = Field(..., description="Source documents used")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "question": "What is Python?",
-                "answer": "Python is a high-level, interpreted programming language...",
-                "source_documents": [
-                    {
-                        "content": "Python is a high-level programming language...",
-                        "metadata": {"source": "python_docs.txt"},
-                        "relevance_score": 0.95
-                    }
-                ]
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _QUESTION_RESPONSE_EXAMPLE})
+
+
+class BatchQuestionResponse(BaseModel):
+    """Response model for batch questions."""
+    results: List[QuestionResponse] = Field(..., description="Answers, in the order of the questions")
+
+    model_config = ConfigDict(json_schema_extra={"example": _BATCH_QUESTION_RESPONSE_EXAMPLE})
 
 
 class VectorStoreInfo(BaseModel):
@@ -92,13 +125,7 @@ class VectorStoreInfo(BaseModel):
     document_count: int = Field(..., description="Number of documents in the store")
     is_initialized: bool = Field(..., description="Whether the store is initialized")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "document_count": 10,
-                "is_initialized": True
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _VECTOR_STORE_INFO_EXAMPLE})
 
 
 class HealthResponse(BaseModel):
@@ -107,14 +134,7 @@ class HealthResponse(BaseModel):
     version: str = Field(..., description="API version")
     vectorstore_initialized: bool = Field(..., description="Whether vectorstore is ready")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "healthy",
-                "version": "1.0.0",
-                "vectorstore_initialized": True
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _HEALTH_RESPONSE_EXAMPLE})
 
 
 class ErrorResponse(BaseModel):
@@ -122,10 +142,4 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "error": "No documents found",
-                "detail": "Please upload documents before asking questions"
-            }
-        }
+    model_config = ConfigDict(json_schema_extra={"example": _ERROR_RESPONSE_EXAMPLE})
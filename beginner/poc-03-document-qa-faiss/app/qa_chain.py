@@ -1,11 +1,14 @@
 """
 Question-answering chain using LangChain and FAISS.
 """
+import asyncio
 import logging
-from typing import Dict, List
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from langchain_openai import ChatOpenAI
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
+from langchain.schema import Document
 
 from app.config import get_settings
 from app.vectorstore_manager import get_vectorstore_manager
@@ -41,12 +44,16 @@ Question: {question}
 
 Answer:"""
 
-        self.prompt = PromptTemplate(
-            template=self.prompt_template,
-            input_variables=["context", "question"]
-        )
+        # The template is fixed, so split it once around its placeholders
+        # and build each prompt by concatenation instead of str.format
+        self._prompt_head, rest = self.prompt_template.split("{context}")
+        self._prompt_middle, self._prompt_tail = rest.split("{question}")
+
+        # Answers keyed by (normalized question, top_k, vectorstore version),
+        # least recently used first; values are (expiry time, result)
+        self._answers: "OrderedDict[Tuple[str, int, int], Tuple[float, Dict]]" = OrderedDict()
 
-    def answer_question(self, question: str, top_k: int = 3) -> Dict:
+    async def answer_question(self, question: str, top_k: int = 3) -> Dict:
         """
         Answer a question using document retrieval.
 
@@ -60,35 +67,115 @@ Answer:"""
         if not self.vectorstore_manager.is_initialized():
             raise ValueError("No documents in vectorstore. Please upload documents first.")
 
-        logger.info(f"Answering question: {question}")
+        # Changing the documents bumps the version, so stale answers miss
+        cache_key = (" ".join(question.split()), top_k, self.vectorstore_manager.version)
+        cached = self._get_cached_answer(cache_key)
+        if cached is not None:
+            logger.info("Answer cache hit for question: %s", question)
+            return cached
 
-        # Create retriever
-        retriever = self.vectorstore_manager.vectorstore.as_retriever(
-            search_kwargs={"k": top_k}
-        )
+        logger.info("Answering question: %s", question)
 
-        # Create RetrievalQA chain
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",  # Simple stuffing strategy
-            retriever=retriever,
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": self.prompt}
-        )
+        # Retrieval reuses the cached question embedding
+        source_docs = [
+            doc for doc, _ in await self.vectorstore_manager.asimilarity_search(question, k=top_k)
+        ]
 
         # Get answer
-        result = qa_chain.invoke({"query": question})
+        message = await self.llm.ainvoke(self._format_prompt(question, source_docs))
+        answer = message.content
 
-        # Extract answer and source documents
-        answer = result["result"]
-        source_docs = result["source_documents"]
+        logger.info("Generated answer with %s source documents", len(source_docs))
 
-        logger.info(f"Generated answer with {len(source_docs)} source documents")
-
-        return {
+        result = {
             "answer": answer,
             "source_documents": source_docs
         }
+        self._cache_answer(cache_key, result)
+        return result
+
+    async def warmup(self):
+        """
+        Open the OpenAI connections used for answering questions.
+
+        Sends a throwaway query embedding and a one-token chat completion, so
+        connection setup, TLS and tokenizer loading happen before the first
+        question instead of during it.
+        """
+        logger.info("Warming up OpenAI clients")
+        results = await asyncio.gather(
+            self.vectorstore_manager.embeddings.aembed_query("warmup"),
+            self.llm.ainvoke("ping", max_tokens=1),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("OpenAI warmup request failed: %s", result)
+
+    def _format_prompt(self, question: str, docs: List[Document]) -> str:
+        """
+        Stuff the retrieved documents into the QA prompt.
+
+        The prompt is built directly rather than through a LangChain
+        "stuff" chain, which adds callback and validation overhead per call
+        without changing the prompt.
+        """
+        context = "\n\n".join(doc.page_content for doc in docs)
+        return "".join((self._prompt_head, context, self._prompt_middle, question, self._prompt_tail))
+
+    def _get_cached_answer(self, key: Tuple[str, int, int]) -> Optional[Dict]:
+        """Return a cached answer that has not expired, or None."""
+        entry = self._answers.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._answers[key]
+            return None
+        self._answers.move_to_end(key)
+        return result
+
+    def _cache_answer(self, key: Tuple[str, int, int], result: Dict):
+        """Cache an answer, evicting the least recently used one when full."""
+        if self.settings.answer_cache_size <= 0:
+            return
+        self._answers[key] = (time.monotonic() + self.settings.answer_cache_ttl_seconds, result)
+        if len(self._answers) > self.settings.answer_cache_size:
+            self._answers.popitem(last=False)
+
+    async def answer_questions(self, questions: List[str], top_k: int = 3) -> List[Dict]:
+        """
+        Answer several questions using document retrieval.
+
+        Retrieval embeds all questions in one request and searches them in
+        one FAISS call; the answers are generated concurrently.
+
+        Args:
+            questions: Questions to answer
+            top_k: Number of documents to retrieve per question
+
+        Returns:
+            One dictionary containing answer and source documents per question
+        """
+        if not self.vectorstore_manager.is_initialized():
+            raise ValueError("No documents in vectorstore. Please upload documents first.")
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Answering %s questions", len(questions))
+
+        source_docs = [
+            [doc for doc, _ in results]
+            for results in await self.vectorstore_manager.asimilarity_search_batch(questions, k=top_k)
+        ]
+        messages = await self.llm.abatch([
+            self._format_prompt(question, docs)
+            for question, docs in zip(questions, source_docs)
+        ])
+
+        return [
+            {"answer": message.content, "source_documents": docs}
+            for message, docs in zip(messages, source_docs)
+        ]
 
     def get_relevant_documents(self, question: str, top_k: int = 3) -> List:
         """
@@ -104,7 +191,7 @@ Answer:"""
         if not self.vectorstore_manager.is_initialized():
             return []
 
-        logger.info(f"Retrieving relevant documents for: {question}")
+        logger.info("Retrieving relevant documents for: %s", question)
 
         results = self.vectorstore_manager.similarity_search(
             query=question,
@@ -114,13 +201,7 @@ Answer:"""
         return results
 
 
-# Global QA chain instance
-_qa_chain: QAChain = None
-
-
+@lru_cache(maxsize=1)
 def get_qa_chain() -> QAChain:
     """Get the global QA chain instance."""
-    global _qa_chain
-    if _qa_chain is None:
-        _qa_chain = QAChain()
-    return _qa_chain
+    return QAChain()
@@ -0,0 +1,107 @@
+"""
+Micro-batching of document uploads into the vector store.
+"""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from langchain.schema import Document
+
+from app.vectorstore_manager import VectorStoreManager
+
+logger = logging.getLogger(__name__)
+
+
+class UploadBatcher:
+    """
+    Coalesces chunks from concurrent uploads into one vector store add.
+
+    Each add embeds its chunks with a single OpenAI request and updates the
+    index once, so uploads that arrive within the batching window share
+    that cost instead of paying it per request. Saving to disk is throttled
+    by the vector store (see VectorStoreManager.flush).
+    """
+
+    def __init__(self, vectorstore_manager: VectorStoreManager, window_ms: int = 50, max_chunks: int = 1000):
+        """
+        Initialize the upload batcher.
+
+        Args:
+            vectorstore_manager: Vector store the batched chunks are added to
+            window_ms: How long to wait for more uploads after the first one
+            max_chunks: Chunk count at which a batch is flushed without waiting
+        """
+        self.vectorstore_manager = vectorstore_manager
+        self.window = window_ms / 1000
+        self.max_chunks = max_chunks
+        self._queue: "asyncio.Queue[Tuple[List[Document], asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background batching task."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def add_documents(self, chunks: List[Document]) -> int:
+        """
+        Add chunks to the vector store as part of the next batch.
+
+        Args:
+            chunks: Document chunks to add
+
+        Returns:
+            Number of chunks added
+
+        Raises:
+            Exception: Whatever the vector store raised for the batch
+        """
+        if not chunks:
+            return 0
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((chunks, future))
+        return await future
+
+    async def _run(self):
+        """Collect queued uploads into batches and add them to the vector store."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            chunk_count = len(batch[0][0])
+            deadline = loop.time() + self.window
+
+            while chunk_count < self.max_chunks:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                chunk_count += len(item[0])
+
+            documents = [chunk for chunks, _ in batch for chunk in chunks]
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Adding batch of %s uploads (%s chunks)", len(batch), len(documents))
+
+            try:
+                # Embedding and saving block, so keep them off the event loop
+                await asyncio.to_thread(self.vectorstore_manager.add_documents, documents)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for chunks, future in batch:
+                    if not future.done():
+                        future.set_result(len(chunks))
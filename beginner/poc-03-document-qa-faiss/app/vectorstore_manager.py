@@ -1,9 +1,18 @@
 """
 Vector store management using FAISS.
 """
+import asyncio
 import logging
 import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Optional
+
+import faiss
+import numpy as np
 from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
 from langchain.schema import Document
@@ -13,6 +22,36 @@ from app.config import get_settings
 logger = logging.getLogger(__name__)
 
 
+def _set_nprobe(index: faiss.Index, nprobe: int):
+    """Set the number of probed clusters if the index is an IVF index."""
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        # Flat index: every vector is scanned, there is nothing to probe
+        pass
+
+
+def build_quantized_index(vectors, index_factory: str, nprobe: int) -> faiss.Index:
+    """
+    Train a quantized (e.g. IVF-SQ8) index on vectors and add them to it.
+
+    Vectors keep their positions, so the FAISS docstore id mapping stays valid.
+
+    Args:
+        vectors: float32 array of shape (n, d)
+        index_factory: FAISS index factory string, e.g. "IVF1024,SQ8"
+        nprobe: Number of IVF clusters probed per query
+
+    Returns:
+        Trained index containing all vectors
+    """
+    index = faiss.index_factory(vectors.shape[1], index_factory)
+    index.train(vectors)
+    index.add(vectors)
+    _set_nprobe(index, nprobe)
+    return index
+
+
 class VectorStoreManager:
     """Manages FAISS vector store operations."""
 
@@ -21,9 +60,37 @@ class VectorStoreManager:
         self.settings = get_settings()
         self.embeddings = OpenAIEmbeddings(
             model=self.settings.openai_embedding_model,
-            openai_api_key=self.settings.openai_api_key
+            openai_api_key=self.settings.openai_api_key,
+            # Chunks per embeddings request
+            chunk_size=self.settings.openai_embedding_batch_size
         )
+        # Query embeddings are cached (least recently used evicted first), so
+        # repeated questions skip the embeddings request
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
         self.vectorstore: Optional[FAISS] = None
+        # Incremented whenever the stored documents change, so results
+        # cached by callers can be invalidated
+        self.version = 0
+        # Whether the index is still the exact IndexFlatL2 (see _maybe_quantize_index)
+        self._flat_index = True
+        # Whether the index is a read-only memory map of the saved index
+        self._index_mmapped = False
+        # Adds since the last save; saving rewrites the whole index, so it
+        # happens every few adds rather than on each one (see flush)
+        self._unsaved_adds = 0
+        self._saved_at = time.monotonic()
+        # Adds and saves run in worker threads, so keep them from interleaving
+        self._lock = threading.RLock()
+
+        # Searches run on the GPU when requested and faiss-gpu finds a device
+        self._gpu_resources = None
+        if self.settings.faiss_use_gpu:
+            if hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0:
+                self._gpu_resources = faiss.StandardGpuResources()
+                logger.info("Using GPU FAISS index")
+            else:
+                logger.warning("FAISS_USE_GPU is set but no GPU is available. Using CPU index.")
+
         self._load_or_create_vectorstore()
 
     def _load_or_create_vectorstore(self):
@@ -32,15 +99,24 @@ class VectorStoreManager:
 
         if os.path.exists(vectorstore_path):
             try:
-                logger.info(f"Loading existing vectorstore from {vectorstore_path}")
+                logger.info("Loading existing vectorstore from %s", vectorstore_path)
                 self.vectorstore = FAISS.load_local(
                     vectorstore_path,
                     self.embeddings,
                     allow_dangerous_deserialization=True
                 )
+                self._flat_index = isinstance(self.vectorstore.index, faiss.IndexFlat)
+                if self.settings.faiss_mmap and not self._flat_index and self._gpu_resources is None:
+                    # Map the inverted lists instead of holding them in memory;
+                    # workers then share the index pages through the page cache
+                    self.vectorstore.index = self._read_index(faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                    self._index_mmapped = True
+                else:
+                    _set_nprobe(self.vectorstore.index, self.settings.faiss_nprobe)
+                    self.vectorstore.index = self._to_device(self.vectorstore.index)
                 logger.info("Vectorstore loaded successfully")
             except Exception as e:
-                logger.warning(f"Failed to load vectorstore: {e}. Creating new one.")
+                logger.warning("Failed to load vectorstore: %s. Creating new one.", e)
                 self.vectorstore = None
         else:
             logger.info("No existing vectorstore found. Will create on first document upload.")
@@ -60,22 +136,121 @@ class VectorStoreManager:
             logger.warning("No documents provided to add")
             return 0
 
-        logger.info(f"Adding {len(documents)} documents to vectorstore")
+        logger.info("Adding %s documents to vectorstore", len(documents))
 
-        if self.vectorstore is None:
-            # Create new vectorstore
-            logger.info("Creating new vectorstore")
-            self.vectorstore = FAISS.from_documents(documents, self.embeddings)
-        else:
-            # Add to existing vectorstore
-            self.vectorstore.add_documents(documents)
+        # Embed before taking the lock, so searches only wait for the index update
+        texts = [doc.page_content for doc in documents]
+        text_embeddings = list(zip(texts, self.embeddings.embed_documents(texts)))
+        metadatas = [doc.metadata for doc in documents]
+
+        with self._lock:
+            if self.vectorstore is None:
+                # Create new vectorstore
+                logger.info("Creating new vectorstore")
+                self.vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas)
+                self.vectorstore.index = self._to_device(self.vectorstore.index)
+                self._flat_index = True
+            else:
+                if self._index_mmapped:
+                    # A memory-mapped index is read-only, so load it to add to it
+                    logger.info("Loading memory-mapped index into memory for writing")
+                    self.vectorstore.index = self._read_index()
+                    self._index_mmapped = False
+                # Add to existing vectorstore
+                self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas)
+
+            self._maybe_quantize_index()
+            self.version += 1
+            self._unsaved_adds += 1
 
-        # Save to disk
-        self.save()
+            # Save to disk once enough adds or time have accumulated
+            if self._unsaved_adds >= self.settings.vector_store_save_every:
+                self.save()
+            else:
+                self.flush(self.settings.vector_store_save_interval_seconds)
 
-        logger.info(f"Successfully added {len(documents)} documents")
+        logger.info("Successfully added %s documents", len(documents))
         return len(documents)
 
+    def _maybe_quantize_index(self):
+        """
+        Replace the exact flat index with a quantized one once it is large enough.
+
+        Small stores keep IndexFlatL2, which needs no training. Once the
+        store reaches faiss_quantize_threshold vectors, the vectors are
+        moved into a trained index_factory index (IVF with int8 scalar
+        quantization by default). Search then only probes faiss_nprobe
+        clusters and stores one byte per dimension instead of a float32;
+        queries stay float32.
+        """
+        index = self.vectorstore.index
+        if not self._flat_index or index.ntotal < self.settings.faiss_quantize_threshold:
+            return
+
+        logger.info(
+            "Building %s index for %s vectors", self.settings.faiss_index_factory, index.ntotal
+        )
+        self.vectorstore.index = self._to_device(build_quantized_index(
+            index.reconstruct_n(0, index.ntotal),
+            self.settings.faiss_index_factory,
+            self.settings.faiss_nprobe
+        ))
+        self._flat_index = False
+
+    def _read_index(self, io_flags: int = 0) -> faiss.Index:
+        """Read the saved FAISS index with the given IO flags."""
+        index = faiss.read_index(os.path.join(self.settings.vector_store_path, "index.faiss"), io_flags)
+        _set_nprobe(index, self.settings.faiss_nprobe)
+        return index
+
+    def _to_device(self, index: faiss.Index) -> faiss.Index:
+        """Move an index to the GPU if GPU search is enabled."""
+        if self._gpu_resources is None:
+            return index
+        return faiss.index_cpu_to_gpu(self._gpu_resources, 0, index)
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a search query, reusing the embedding of identical earlier queries.
+
+        Whitespace is normalized before the lookup. The returned list is shared
+        with the cache and must not be modified.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Embedding vector of the query
+        """
+        query = " ".join(query.split())
+        embedding = self._get_cached_query_embedding(query)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            self._cache_query_embedding(query, embedding)
+        return embedding
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Async version of embed_query, sharing its cache."""
+        query = " ".join(query.split())
+        embedding = self._get_cached_query_embedding(query)
+        if embedding is None:
+            embedding = await self.embeddings.aembed_query(query)
+            self._cache_query_embedding(query, embedding)
+        return embedding
+
+    def _get_cached_query_embedding(self, query: str) -> Optional[List[float]]:
+        """Look up a normalized query in the embedding cache."""
+        embedding = self._query_embeddings.get(query)
+        if embedding is not None:
+            self._query_embeddings.move_to_end(query)
+        return embedding
+
+    def _cache_query_embedding(self, query: str, embedding: List[float]):
+        """Add a query embedding to the cache, evicting the least recently used one."""
+        self._query_embeddings[query] = embedding
+        if len(self._query_embeddings) > self.settings.query_embedding_cache_size:
+            self._query_embeddings.popitem(last=False)
+
     def similarity_search(
         self,
         query: str,
@@ -97,20 +272,111 @@ class VectorStoreManager:
             logger.warning("Vectorstore not initialized. No documents to search.")
             return []
 
-        logger.info(f"Searching for: {query} (top_k={k})")
+        logger.info("Searching for: %s (top_k=%s)", query, k)
+
+        results = self._search_by_vectors([self.embed_query(query)], k, score_threshold)[0]
+
+        logger.info("Found %s results", len(results))
+        return results
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 3,
+        score_threshold: Optional[float] = None
+    ) -> List[tuple]:
+        """Async version of similarity_search."""
+        if self.vectorstore is None:
+            logger.warning("Vectorstore not initialized. No documents to search.")
+            return []
 
-        # Perform similarity search with scores
-        results = self.vectorstore.similarity_search_with_score(query, k=k)
+        logger.info("Searching for: %s (top_k=%s)", query, k)
 
-        # Filter by score threshold if provided
-        if score_threshold is not None:
-            # FAISS returns distance (lower is better), not similarity
-            # For L2 distance, we can use a threshold
-            results = [(doc, score) for doc, score in results if score <= score_threshold]
+        embedding = await self.aembed_query(query)
+        # The search waits for any add in progress, so run it off the event loop
+        results = (await asyncio.to_thread(self._search_by_vectors, [embedding], k, score_threshold))[0]
 
-        logger.info(f"Found {len(results)} results")
+        logger.info("Found %s results", len(results))
         return results
 
+    def similarity_search_batch(self, queries: List[str], k: int = 3) -> List[List[tuple]]:
+        """
+        Search for documents similar to each of several queries.
+
+        The queries are embedded in one request and searched with a single
+        FAISS call over the query matrix.
+
+        Args:
+            queries: Search queries
+            k: Number of results to return per query
+
+        Returns:
+            One list of (document, score) tuples per query
+        """
+        if self.vectorstore is None:
+            logger.warning("Vectorstore not initialized. No documents to search.")
+            return [[] for _ in queries]
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Searching for %s queries (top_k=%s)", len(queries), k)
+
+        return self._search_by_vectors(self.embeddings.embed_documents(queries), k)
+
+    async def asimilarity_search_batch(self, queries: List[str], k: int = 3) -> List[List[tuple]]:
+        """Async version of similarity_search_batch."""
+        if self.vectorstore is None:
+            logger.warning("Vectorstore not initialized. No documents to search.")
+            return [[] for _ in queries]
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Searching for %s queries (top_k=%s)", len(queries), k)
+
+        embeddings = await self.embeddings.aembed_documents(queries)
+        return await asyncio.to_thread(self._search_by_vectors, embeddings, k)
+
+    def _search_by_vectors(
+        self,
+        embeddings: List[List[float]],
+        k: int,
+        score_threshold: Optional[float] = None
+    ) -> List[List[tuple]]:
+        """
+        Search the index with a matrix of query embeddings in one FAISS call.
+
+        Padding and, if given, the score threshold are applied as one mask
+        over the FAISS result arrays, so only the documents that are kept
+        are looked up in the docstore.
+
+        Adds run in worker threads and FAISS releases the GIL while adding
+        and searching, so the index and its docstore mapping are read under
+        the same lock as adds; otherwise a search could see a half-updated
+        index or ids the mapping does not have yet.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+
+        with self._lock:
+            if self.vectorstore is None:
+                # Cleared since the caller checked
+                return [[] for _ in embeddings]
+
+            scores, indices = self.vectorstore.index.search(vectors, k)
+
+            # FAISS pads with -1 when fewer than k vectors match
+            keep = indices != -1
+            if score_threshold is not None:
+                # Scores are L2 distances, so lower is more similar
+                keep &= scores <= score_threshold
+
+            index_to_id = self.vectorstore.index_to_docstore_id
+            docstore = self.vectorstore.docstore
+            return [
+                [
+                    (docstore.search(index_to_id[i]), float(score))
+                    for score, i in zip(query_scores[query_keep], query_indices[query_keep])
+                ]
+                for query_scores, query_indices, query_keep in zip(scores, indices, keep)
+            ]
+
     def get_document_count(self) -> int:
         """Get the number of documents in the vectorstore."""
         if self.vectorstore is None:
@@ -121,30 +387,76 @@ class VectorStoreManager:
         """Check if vectorstore is initialized."""
         return self.vectorstore is not None and self.get_document_count() > 0
 
+    def flush(self, min_interval_seconds: float = 0.0):
+        """
+        Save vectorstore to disk if it has changed since the last save.
+
+        Args:
+            min_interval_seconds: Skip the save if the last one was more
+                recent than this
+        """
+        with self._lock:
+            if self._unsaved_adds and time.monotonic() - self._saved_at >= min_interval_seconds:
+                self.save()
+
     def save(self):
         """Save vectorstore to disk."""
-        if self.vectorstore is not None:
-            logger.info(f"Saving vectorstore to {self.settings.vector_store_path}")
-            self.vectorstore.save_local(self.settings.vector_store_path)
+        with self._lock:
+            self._unsaved_adds = 0
+            self._saved_at = time.monotonic()
+            if self.vectorstore is None:
+                return
+            if self._index_mmapped:
+                # Unchanged since it was loaded, and rewriting the mapped
+                # file would invalidate the mapping
+                return
+            logger.info("Saving vectorstore to %s", self.settings.vector_store_path)
+            if self._gpu_resources is None:
+                self._save_local()
+                return
+
+            # GPU indexes cannot be serialized, so save a CPU copy
+            index = self.vectorstore.index
+            self.vectorstore.index = faiss.index_gpu_to_cpu(index)
+            try:
+                self._save_local()
+            finally:
+                self.vectorstore.index = index
+
+    def _save_local(self):
+        """
+        Save the vectorstore files by replacing them, never rewriting them in place.
+
+        Other workers may have index.faiss memory-mapped; writing into that
+        file would change the pages under their mapping. Saving to a temporary
+        directory and renaming each file over the old one leaves existing
+        mappings on the old file, which is freed once they close.
+        """
+        path = self.settings.vector_store_path
+        os.makedirs(path, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=path, prefix=".save-") as tmp_path:
+            self.vectorstore.save_local(tmp_path)
+            # The docstore first: an index loaded between the two renames then
+            # only misses new documents, rather than returning unknown ids
+            for name in ("index.pkl", "index.faiss"):
+                os.replace(os.path.join(tmp_path, name), os.path.join(path, name))
 
     def clear(self):
         """Clear the vectorstore."""
         logger.info("Clearing vectorstore")
-        self.vectorstore = None
-        # Remove saved vectorstore files
-        if os.path.exists(self.settings.vector_store_path):
-            import shutil
-            shutil.rmtree(self.settings.vector_store_path)
-            logger.info("Vectorstore files removed")
-
-
-# Global vectorstore manager instance
-_vectorstore_manager: Optional[VectorStoreManager] = None
+        with self._lock:
+            self.vectorstore = None
+            self._index_mmapped = False
+            self._unsaved_adds = 0
+            self.version += 1
+            # Remove saved vectorstore files
+            if os.path.exists(self.settings.vector_store_path):
+                import shutil
+                shutil.rmtree(self.settings.vector_store_path)
+                logger.info("Vectorstore files removed")
 
 
+@lru_cache(maxsize=1)
 def get_vectorstore_manager() -> VectorStoreManager:
     """Get the global vectorstore manager instance."""
-    global _vectorstore_manager
-    if _vectorstore_manager is None:
-        _vectorstore_manager = VectorStoreManager()
-    return _vectorstore_manager
+    return VectorStoreManager()
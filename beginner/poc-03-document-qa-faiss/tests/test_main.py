@@ -11,8 +11,9 @@ from app.main import app
 
 @pytest.fixture
 def client():
-    """Create a test client."""
-    return TestClient(app)
+    """Create a test client with the application lifespan running."""
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture(autouse=True)
@@ -117,6 +118,29 @@ def test_ask_question_success(mock_initialized, mock_answer, client, mock_qa_res
     assert len(data["source_documents"]) > 0
 
 
+@patch('app.qa_chain.QAChain.answer_questions')
+@patch('app.vectorstore_manager.VectorStoreManager.is_initialized')
+def test_ask_questions_batch(mock_initialized, mock_answer, client, mock_qa_result):
+    """Test answering several questions in one request."""
+    # Setup mocks
+    mock_initialized.return_value = True
+    mock_answer.return_value = [mock_qa_result, mock_qa_result]
+
+    # Make request
+    request_data = {
+        "questions": ["What is Python?", "Why is Python popular?"],
+        "top_k": 2
+    }
+    response = client.post("/ask/batch", json=request_data)
+
+    # Assertions
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["question"] for result in results] == request_data["questions"]
+    assert all(len(result["source_documents"]) > 0 for result in results)
+    mock_answer.assert_called_once_with(questions=request_data["questions"], top_k=2)
+
+
 @patch('app.vectorstore_manager.VectorStoreManager.is_initialized')
 def test_ask_question_no_documents(mock_initialized, client):
     """Test asking question without uploaded documents."""
@@ -191,3 +215,215 @@ def test_top_k_parameter(client):
     # Invalid top_k (too large)
     response = client.post("/ask", json={"question": "What is Python?", "top_k": 20})
     assert response.status_code == 422  # Validation error
+
+
+def test_process_text_shares_metadata(sample_document):
+    """Test that chunks share one copy of the caller's metadata."""
+    from app.document_processor import DocumentProcessor
+    metadata = sample_document["metadata"]
+    chunks = DocumentProcessor().process_text(sample_document["content"], metadata, chunk_size=40, chunk_overlap=0)
+
+    assert len(chunks) > 1
+    assert all(chunk.metadata is chunks[0].metadata for chunk in chunks)
+    assert chunks[0].metadata == metadata
+    assert chunks[0].metadata is not metadata
+
+
+@pytest.mark.parametrize("index_factory", ["IVF8,SQ8", "IVF8,PQ4x4"])
+def test_build_quantized_index(index_factory):
+    """Test that a quantized index keeps vector positions for the docstore mapping."""
+    import numpy as np
+    from app.vectorstore_manager import build_quantized_index
+
+    vectors = np.random.default_rng(0).random((1000, 32), dtype=np.float32)
+    index = build_quantized_index(vectors, index_factory, nprobe=8)
+
+    assert index.ntotal == len(vectors)
+    _, ids = index.search(vectors[:5], 1)
+    assert ids[:, 0].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_search_while_adding_documents():
+    """Test that searches running alongside adds only see fully added documents."""
+    import threading
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+    from app.vectorstore_manager import get_vectorstore_manager
+
+    vectorstore_manager = get_vectorstore_manager()
+    embeddings = DeterministicFakeEmbedding(size=64)
+    errors = []
+
+    def add_batches():
+        try:
+            for batch in range(50):
+                vectorstore_manager.add_documents([
+                    Document(page_content=f"batch {batch} chunk {i}", metadata={"source": "test.txt"})
+                    for i in range(20)
+                ])
+        except Exception as e:
+            errors.append(e)
+
+    with patch.object(vectorstore_manager, "embeddings", embeddings):
+        vectorstore_manager.add_documents([Document(page_content="first chunk", metadata={})])
+        query = [embeddings.embed_query("chunk")]
+        adder = threading.Thread(target=add_batches)
+        adder.start()
+        while adder.is_alive():
+            for doc, _ in vectorstore_manager._search_by_vectors(query, k=10)[0]:
+                assert isinstance(doc, Document)
+        adder.join()
+
+    assert not errors
+    assert vectorstore_manager.get_document_count() == 1001
+
+
+def _run_batched_uploads(vectorstore_manager, uploads):
+    """Send uploads to a fresh UploadBatcher concurrently and return their outcomes."""
+    import asyncio
+    from app.upload_batcher import UploadBatcher
+
+    async def upload_all():
+        batcher = UploadBatcher(vectorstore_manager, window_ms=50)
+        batcher.start()
+        try:
+            return await asyncio.gather(
+                *(batcher.add_documents(chunks) for chunks in uploads),
+                return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(upload_all())
+
+
+def test_upload_batcher_coalesces_concurrent_uploads():
+    """Test that uploads within one window reach the vector store as a single add."""
+    vectorstore_manager = Mock()
+    uploads = [
+        [Document(page_content=f"upload {upload} chunk {i}") for i in range(upload + 1)]
+        for upload in range(3)
+    ]
+
+    results = _run_batched_uploads(vectorstore_manager, uploads)
+
+    assert results == [1, 2, 3]
+    vectorstore_manager.add_documents.assert_called_once_with(
+        [chunk for chunks in uploads for chunk in chunks]
+    )
+
+
+def test_upload_batcher_propagates_batch_failure():
+    """Test that a failed batch raises its exception in every upload of the batch."""
+    vectorstore_manager = Mock()
+    error = RuntimeError("embeddings request failed")
+    vectorstore_manager.add_documents.side_effect = error
+    uploads = [[Document(page_content="first")], [Document(page_content="second")]]
+
+    results = _run_batched_uploads(vectorstore_manager, uploads)
+
+    assert results == [error, error]
+    assert vectorstore_manager.add_documents.call_count == 1
+
+
+def test_vectorstore_saves_every_n_adds_and_on_flush(tmp_path):
+    """Test that adds are saved every vector_store_save_every adds, after the interval, and on shutdown."""
+    import time
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+    from langchain_community.vectorstores import FAISS
+    from app.vectorstore_manager import get_vectorstore_manager
+
+    vectorstore_manager = get_vectorstore_manager()
+    settings = vectorstore_manager.settings.model_copy(update={
+        "vector_store_path": str(tmp_path),
+        "vector_store_save_every": 3,
+        "vector_store_save_interval_seconds": 3600
+    })
+
+    def add():
+        vectorstore_manager.add_documents([Document(page_content="chunk", metadata={})])
+
+    with patch.object(vectorstore_manager, "embeddings", DeterministicFakeEmbedding(size=16)), \
+            patch.object(vectorstore_manager, "settings", settings), \
+            patch("app.vectorstore_manager.FAISS.save_local", autospec=True,
+                  side_effect=FAISS.save_local) as mock_save_local:
+        vectorstore_manager._saved_at = time.monotonic()
+        add()
+        add()
+        assert mock_save_local.call_count == 0
+        add()
+        assert mock_save_local.call_count == 1
+
+        # The interval has passed, so the next add saves on its own
+        vectorstore_manager._saved_at -= 3600
+        add()
+        assert mock_save_local.call_count == 2
+
+        # Unsaved adds are saved when the application shuts down
+        add()
+        with TestClient(app):
+            pass
+        assert mock_save_local.call_count == 3
+
+        # Nothing left to save
+        vectorstore_manager.flush()
+        assert mock_save_local.call_count == 3
+
+
+def test_vectorstore_save_replaces_index_files(tmp_path):
+    """Test that saving renames new index files into place instead of rewriting the old ones."""
+    import os
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+    from app.vectorstore_manager import get_vectorstore_manager
+
+    vectorstore_manager = get_vectorstore_manager()
+    settings = vectorstore_manager.settings.model_copy(update={"vector_store_path": str(tmp_path)})
+
+    with patch.object(vectorstore_manager, "embeddings", DeterministicFakeEmbedding(size=16)), \
+            patch.object(vectorstore_manager, "settings", settings):
+        vectorstore_manager.add_documents([Document(page_content="first", metadata={})])
+        vectorstore_manager.save()
+        saved = os.stat(tmp_path / "index.faiss")
+
+        vectorstore_manager.add_documents([Document(page_content="second", metadata={})])
+        vectorstore_manager.save()
+
+    # A new file took the old one's place, so mappings of the old one are untouched
+    assert os.stat(tmp_path / "index.faiss").st_ino != saved.st_ino
+    assert sorted(os.listdir(tmp_path)) == ["index.faiss", "index.pkl"]
+
+
+def test_answer_cache_invalidated_by_document_changes():
+    """Test that repeated questions are answered from cache until the documents change."""
+    import asyncio
+    from unittest.mock import AsyncMock
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+    from app.qa_chain import get_qa_chain
+
+    qa_chain = get_qa_chain()
+    qa_chain._answers.clear()
+    vectorstore_manager = qa_chain.vectorstore_manager
+    llm = Mock()
+    llm.ainvoke = AsyncMock(return_value=Mock(content="Python is a programming language."))
+
+    def add():
+        vectorstore_manager.add_documents([Document(page_content="Python is a programming language.", metadata={})])
+
+    with patch.object(vectorstore_manager, "embeddings", DeterministicFakeEmbedding(size=16)), \
+            patch.object(qa_chain, "llm", llm):
+        add()
+        first = asyncio.run(qa_chain.answer_question("What is Python?"))
+        # Whitespace is normalized, so this is the same question
+        second = asyncio.run(qa_chain.answer_question("  What is   Python? "))
+        assert second is first
+        assert llm.ainvoke.call_count == 1
+
+        # An upload changes the documents, so the next ask misses
+        add()
+        asyncio.run(qa_chain.answer_question("What is Python?"))
+        assert llm.ainvoke.call_count == 2
+
+        # So does clearing the vectorstore
+        vectorstore_manager.clear()
+        add()
+        asyncio.run(qa_chain.answer_question("What is Python?"))
+        assert llm.ainvoke.call_count == 3
@@ -1,5 +1,5 @@
 """
 POC 4: Pydantic AI Response Structuring
-Structured output extraction using Pydantic and OpenAI function calling.
+Structured output extraction using Pydantic and OpenAI structured outputs.
 """
 __version__ = "1.0.0"
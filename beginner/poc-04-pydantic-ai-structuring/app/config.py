@@ -11,17 +11,36 @@ class Settings(BaseSettings):
     # API Configuration
     api_title: str = "POC 4: Pydantic AI Response Structuring"
     api_version: str = "1.0.0"
-    api_description: str = "Structured output extraction using Pydantic and OpenAI function calling"
+    api_description: str = "Structured output extraction using Pydantic and OpenAI structured outputs"
 
     # OpenAI Configuration
     openai_api_key: str
-    openai_model: str = "gpt-3.5-turbo-1106"  # Supports function calling
+    openai_model: str = "gpt-4o-mini"  # Supports structured outputs (json_schema)
     openai_timeout: int = 30
+    # Fail fast when OpenAI cannot be reached instead of waiting the full timeout
+    openai_connect_timeout: float = 5.0
+    openai_http2: bool = True
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
     temperature: float = 0.0  # Use 0 for deterministic extraction
 
     # Application Configuration
     log_level: str = "INFO"
+    workers: int = 1
+    reload: bool = False
     default_confidence_threshold: float = 0.7
+    # Skip the OpenAI call for contact texts without an email address or
+    # phone number; faster, but misses contacts given by name only
+    contact_prefilter: bool = False
+    # Larger request bodies are rejected before parsing; fits a full batch
+    # of 20 texts of 10000 characters
+    max_request_body_bytes: int = 1048576
+    # Responses smaller than this are not compressed
+    gzip_minimum_size: int = 1024
+
+    # Extraction Cache Configuration
+    extraction_cache_size: int = 1024
+    extraction_cache_ttl_seconds: int = 3600
 
     class Config:
         env_file = ".env"
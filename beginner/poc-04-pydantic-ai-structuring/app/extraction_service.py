@@ -1,11 +1,15 @@
 """
-Service for extracting structured data using OpenAI function calling.
+Service for extracting structured data using OpenAI structured outputs.
 """
+import hashlib
 import logging
-import json
-from typing import Type, TypeVar, Any, Dict
-from pydantic import BaseModel
-from openai import OpenAI
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Type, TypeVar, Dict, Optional, Tuple
+import httpx
+from pydantic import BaseModel, ValidationError
+from openai import APIError, AsyncOpenAI
 
 from app.config import get_settings
 
@@ -13,6 +17,9 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar('T', bound=BaseModel)
 
+# Field values that count as not extracted when computing confidence
+_EMPTY_VALUES = (None, "", [], {})
+
 
 class ExtractionService:
     """Service for extracting structured data from text using OpenAI."""
@@ -20,56 +27,69 @@ class ExtractionService:
     def __init__(self):
         """Initialize extraction service."""
         self.settings = get_settings()
-        self.client = OpenAI(
+        # One pooled client shared by all concurrent extractions; with HTTP/2,
+        # concurrent requests are multiplexed over the pooled connections
+        self.client = AsyncOpenAI(
             api_key=self.settings.openai_api_key,
-            timeout=self.settings.openai_timeout
+            timeout=httpx.Timeout(self.settings.openai_timeout, connect=self.settings.openai_connect_timeout),
+            http_client=httpx.AsyncClient(
+                http2=self.settings.openai_http2,
+                limits=httpx.Limits(
+                    max_connections=self.settings.openai_max_connections,
+                    max_keepalive_connections=self.settings.openai_max_keepalive_connections
+                )
+            )
         )
 
-    def _pydantic_to_function_schema(self, model: Type[BaseModel]) -> Dict:
+        # Results keyed by (model, schema name, text digest), least recently
+        # used first; values are (expiry time, (data, confidence))
+        self._results: "OrderedDict[Tuple[type, str, bytes], Tuple[float, Tuple[BaseModel, float]]]" = OrderedDict()
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _response_format(model: Type[BaseModel], schema_name: str, schema_description: str) -> Dict:
         """
-        Convert Pydantic model to OpenAI function schema.
+        Build the structured outputs response format for a Pydantic model.
+
+        The model's JSON schema is sent as is, including its $defs, so no
+        schema rewriting is needed. Cached per model, name and description;
+        the returned dict is shared and must not be modified.
 
         Args:
             model: Pydantic model class
+            schema_name: Name of the schema for OpenAI
+            schema_description: Description of what the schema captures
 
         Returns:
-            Function schema dictionary
+            Response format dictionary
         """
-        schema = model.model_json_schema()
-
-        # Build function parameters from schema
-        parameters = {
-            "type": "object",
-            "properties": schema.get("properties", {}),
-            "required": schema.get("required", [])
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": schema_name,
+                "description": schema_description,
+                "schema": model.model_json_schema(),
+                # Strict mode rejects schemas with defaults and optional
+                # fields, which the extraction models rely on
+                "strict": False
+            }
         }
 
-        # Remove definitions if present (not needed in function schema)
-        if "$defs" in schema:
-            # Inline definitions into properties
-            self._inline_definitions(parameters["properties"], schema["$defs"])
-
-        return parameters
-
-    def _inline_definitions(self, properties: Dict, definitions: Dict):
-        """Inline schema definitions into properties."""
-        for key, value in properties.items():
-            if isinstance(value, dict):
-                # Handle $ref references
-                if "$ref" in value:
-                    ref_path = value["$ref"].split("/")[-1]
-                    if ref_path in definitions:
-                        properties[key] = definitions[ref_path]
-                # Handle arrays with $ref
-                elif "items" in value and isinstance(value["items"], dict) and "$ref" in value["items"]:
-                    ref_path = value["items"]["$ref"].split("/")[-1]
-                    if ref_path in definitions:
-                        value["items"] = definitions[ref_path]
-                # Recursively process nested objects
-                elif "properties" in value:
-                    self._inline_definitions(value["properties"], definitions)
-
-    def extract_structured_data(
+    def prepare_response_format(self, model: Type[BaseModel], schema_name: str, schema_description: str):
+        """
+        Build and cache a model's response format ahead of its first extraction.
+
+        Pydantic builds validators when a model class is defined, but JSON
+        schemas are generated on demand, so this moves that work to startup.
+
+        Args:
+            model: Pydantic model class
+            schema_name: Name of the schema for OpenAI
+            schema_description: Description of what the schema captures
+        """
+        self._response_format(model, schema_name, schema_description)
+
+    async def extract_structured_data(
         self,
         text: str,
         model: Type[T],
@@ -78,13 +98,13 @@ class ExtractionService:
         system_prompt: str = None
     ) -> T:
         """
-        Extract structured data from text using OpenAI function calling.
+        Extract structured data from text using OpenAI structured outputs.
 
         Args:
             text: Input text to extract from
             model: Pydantic model class to extract into
-            function_name: Name of the function for OpenAI
-            function_description: Description of what the function does
+            function_name: Name of the output schema for OpenAI
+            function_description: Description of what the schema captures
             system_prompt: Optional system prompt
 
         Returns:
@@ -92,20 +112,12 @@ class ExtractionService:
 
         Raises:
             ValueError: If extraction fails or model validation fails
+            APIError: If the OpenAI request fails
         """
-        logger.info(f"Extracting structured data using model: {model.__name__}")
+        logger.info("Extracting structured data using model: %s", model.__name__)
 
-        # Build function schema from Pydantic model
-        parameters = self._pydantic_to_function_schema(model)
-
-        # Define the function
-        functions = [
-            {
-                "name": function_name,
-                "description": function_description,
-                "parameters": parameters
-            }
-        ]
+        # Build the response format from the Pydantic model
+        response_format = self._response_format(model, function_name, function_description)
 
         # Build messages
         messages = []
@@ -114,39 +126,39 @@ class ExtractionService:
         messages.append({"role": "user", "content": text})
 
         try:
-            # Call OpenAI with function calling
-            response = self.client.chat.completions.create(
+            # Call OpenAI with the model's JSON schema as response format
+            response = await self.client.chat.completions.create(
                 model=self.settings.openai_model,
                 messages=messages,
-                functions=functions,
-                function_call={"name": function_name},  # Force function call
+                response_format=response_format,
                 temperature=self.settings.temperature
             )
 
-            # Extract function call arguments
             message = response.choices[0].message
 
-            if not message.function_call:
-                raise ValueError("No function call in response")
-
-            # Parse arguments
-            arguments_str = message.function_call.arguments
-            arguments = json.loads(arguments_str)
+            refusal = getattr(message, "refusal", None)
+            if refusal:
+                raise ValueError(f"Model refused the extraction: {refusal}")
+            if not message.content:
+                raise ValueError("No content in response")
 
-            # Validate and create Pydantic model instance
-            result = model(**arguments)
+            # Parse and validate the JSON in one step
+            result = model.model_validate_json(message.content)
 
-            logger.info(f"Successfully extracted data into {model.__name__}")
+            logger.info("Successfully extracted data into %s", model.__name__)
             return result
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from function call: {e}")
-            raise ValueError(f"Invalid JSON in function call response: {e}")
+        except ValidationError as e:
+            logger.error("Response does not match %s: %s", model.__name__, e)
+            raise ValueError(f"Invalid structured output response: {e}")
+        except APIError:
+            # Upstream failures are passed on for the caller to map to a status
+            raise
         except Exception as e:
-            logger.error(f"Extraction failed: {e}", exc_info=True)
+            logger.error("Extraction failed: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
             raise ValueError(f"Failed to extract structured data: {e}")
 
-    def extract_with_confidence(
+    async def extract_with_confidence(
         self,
         text: str,
         model: Type[T],
@@ -167,8 +179,15 @@ class ExtractionService:
         Returns:
             Tuple of (extracted_data, confidence_score)
         """
+        # Keyed by a digest of the text, so cached entries do not hold the texts
+        cache_key = (model, function_name, hashlib.blake2b(text.encode(), digest_size=16).digest())
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            logger.info("Extraction cache hit for model: %s", model.__name__)
+            return cached
+
         # Extract data
-        data = self.extract_structured_data(
+        data = await self.extract_structured_data(
             text=text,
             model=model,
             function_name=function_name,
@@ -178,19 +197,42 @@ class ExtractionService:
 
         # Calculate simple confidence based on field completion
         # (In production, you might use logprobs or a separate confidence model)
+        values = data.__dict__
         total_fields = len(model.model_fields)
         filled_fields = sum(
             1 for field_name in model.model_fields
-            if getattr(data, field_name) is not None
-            and getattr(data, field_name) != []
-            and getattr(data, field_name) != {}
-            and getattr(data, field_name) != ""
+            if values.get(field_name) not in _EMPTY_VALUES
         )
 
         confidence = filled_fields / total_fields if total_fields > 0 else 0.0
 
+        self._cache_result(cache_key, (data, confidence))
         return data, confidence
 
+    def _get_cached_result(self, key: Tuple[type, str, bytes]) -> Optional[Tuple[BaseModel, float]]:
+        """Return a cached extraction result that has not expired, or None."""
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return result
+
+    def _cache_result(self, key: Tuple[type, str, bytes], result: Tuple[BaseModel, float]):
+        """Cache an extraction result, evicting the least recently used one when full."""
+        if self.settings.extraction_cache_size <= 0:
+            return
+        self._results[key] = (time.monotonic() + self.settings.extraction_cache_ttl_seconds, result)
+        if len(self._results) > self.settings.extraction_cache_size:
+            self._results.popitem(last=False)
+
+    async def close(self):
+        """Close the OpenAI client and its connection pool."""
+        await self.client.close()
+
 
 # Global extraction service instance
 _extraction_service: ExtractionService = None
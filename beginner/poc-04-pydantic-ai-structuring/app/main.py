@@ -2,35 +2,55 @@
 Main FastAPI application for Pydantic AI Response Structuring.
 POC 4: Pydantic AI Response Structuring
 """
+import asyncio
 import logging
-from contextlib import asynccontextmanager
-
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+import os
+import queue
+import re
+from contextlib import asynccontextmanager, contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from openai import APIConnectionError, APIError, RateLimitError
+from pydantic import BaseModel
 
 from app.config import get_settings
 from app.models import (
     ExtractionRequest,
+    BatchExtractionRequest,
     ContactInfo,
     ContactExtractionResponse,
     Recipe,
     RecipeExtractionResponse,
+    RecipeBatchExtractionResponse,
     EventInfo,
     EventExtractionResponse,
     ProductInfo,
     ProductExtractionResponse,
     SentimentAnalysis,
     SentimentExtractionResponse,
+    SentimentBatchExtractionResponse,
     HealthResponse,
     ErrorResponse
 )
-from app.extraction_service import get_extraction_service
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from app.extraction_service import ExtractionService, get_extraction_service
+
+# Configure logging: request handlers only enqueue records, a background
+# listener thread formats them and writes to stderr
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 )
+log_listener = QueueListener(log_queue, log_handler)
+queue_handler = QueueHandler(log_queue)
+# Without its own formatter, basicConfig would give the queue handler the
+# default "LEVEL:name:message" format, which the listener then wraps again
+queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
 logger = logging.getLogger(__name__)
 
 
@@ -38,338 +58,460 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
     # Startup
+    log_listener.start()
     logger.info("Initializing Pydantic AI Structuring service...")
     try:
         # Initialize extraction service
-        extraction_service = get_extraction_service()
+        app.state.extraction_service = get_extraction_service()
+        # Generate each model's JSON schema now rather than on its first request
+        for extraction in _EXTRACTIONS:
+            app.state.extraction_service.prepare_response_format(
+                extraction["model"], extraction["function_name"], extraction["function_description"]
+            )
         logger.info("Extraction service initialized successfully")
     except Exception as e:
-        logger.error(f"Failed to initialize service: {str(e)}")
+        logger.error("Failed to initialize service: %s", e)
+        log_listener.stop()
         raise
 
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
+    await app.state.extraction_service.close()
+    log_listener.stop()
 
 
-# Initialize FastAPI app
-settings = get_settings()
-app = FastAPI(
-    title=settings.api_title,
-    version=settings.api_version,
-    description=settings.api_description,
-    lifespan=lifespan
-)
+def get_service(request: Request) -> ExtractionService:
+    """Get the extraction service created during application startup."""
+    return request.app.state.extraction_service
 
 
-@app.get("/", response_model=HealthResponse, tags=["Health"])
-async def root():
-    """Root endpoint - health check."""
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version
-    )
+# Something shaped like an email address or phone number (see contact_prefilter)
+_CONTACT_HINT = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+|\d{3}[-.\s)]*\d{3}[-.\s]?\d{4}")
 
+# Extraction parameters per endpoint, shared by the single and batch routes
+_CONTACT_EXTRACTION = dict(
+    model=ContactInfo,
+    function_name="extract_contact_info",
+    function_description="Extract contact information including name, email, phone, company, and address from text",
+    system_prompt="You are an expert at extracting contact information from text. Extract all available contact details accurately."
+)
 
-@app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
-    """Health check endpoint to verify service is running."""
-    return HealthResponse(
-        status="healthy",
-        version=settings.api_version
-    )
+_RECIPE_EXTRACTION = dict(
+    model=Recipe,
+    function_name="extract_recipe",
+    function_description="Extract recipe information including title, ingredients with quantities, step-by-step instructions, prep time, cook time, and servings",
+    system_prompt="You are an expert at parsing recipes. Extract all recipe details in a structured format."
+)
 
+_EVENT_EXTRACTION = dict(
+    model=EventInfo,
+    function_name="extract_event_info",
+    function_description="Extract event information including title, description, date, time, location, organizer, and attendees",
+    system_prompt="You are an expert at extracting event details from text. Parse all event information accurately."
+)
 
-@app.post(
-    "/extract/contact",
-    response_model=ContactExtractionResponse,
-    status_code=status.HTTP_200_OK,
-    responses={
-        400: {"model": ErrorResponse, "description": "Bad Request"},
-        500: {"model": ErrorResponse, "description": "Internal Server Error"},
-    },
-    tags=["Extraction"]
+_PRODUCT_EXTRACTION = dict(
+    model=ProductInfo,
+    function_name="extract_product_info",
+    function_description="Extract product information including name, category, price, brand, description, features, and specifications",
+    system_prompt="You are an expert at extracting product details from descriptions. Parse all product information in a structured format."
 )
-async def extract_contact_info(request: ExtractionRequest):
-    """
-    Extract contact information from text.
-    Extracts names, emails, phone numbers, companies, and addresses.
 
-    Args:
-        request: Text to extract contact information from
+_SENTIMENT_EXTRACTION = dict(
+    model=SentimentAnalysis,
+    function_name="analyze_sentiment",
+    function_description="Analyze sentiment from text, identifying overall sentiment (positive/negative/neutral/mixed), positive and negative aspects, and providing a summary",
+    system_prompt="You are an expert at sentiment analysis. Accurately identify the overall sentiment and extract specific positive and negative aspects mentioned in the text."
+)
 
-    Returns:
-        ContactExtractionResponse with extracted contact details
+_EXTRACTIONS = (
+    _CONTACT_EXTRACTION,
+    _RECIPE_EXTRACTION,
+    _EVENT_EXTRACTION,
+    _PRODUCT_EXTRACTION,
+    _SENTIMENT_EXTRACTION
+)
 
-    Raises:
-        HTTPException: On extraction errors
+
+def _json_response(response: BaseModel) -> Response:
     """
-    try:
-        logger.info("Extracting contact information...")
+    Serialize a response model straight to JSON.
 
-        extraction_service = get_extraction_service()
+    Returning the model itself would make FastAPI validate it against the
+    route's response_model again; pydantic-core serializes it in one step.
+    """
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
-        # Extract contact info
-        contact, confidence = extraction_service.extract_with_confidence(
-            text=request.text,
-            model=ContactInfo,
-            function_name="extract_contact_info",
-            function_description="Extract contact information including name, email, phone, company, and address from text",
-            system_prompt="You are an expert at extracting contact information from text. Extract all available contact details accurately."
-        )
 
-        return ContactExtractionResponse(
-            contacts=[contact],
-            confidence=confidence
-        )
+@contextmanager
+def _http_errors(action: str):
+    """
+    Turn extraction failures into HTTP errors.
+
+    Args:
+        action: What was being done, for the error message (e.g. "extract recipe")
 
+    Raises:
+        HTTPException: 400 for invalid extraction output, 429 when OpenAI
+            rate limits the request, 503 when OpenAI cannot be reached, 502
+            for other OpenAI errors and 500 for anything else
+    """
+    try:
+        yield
     except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
+        logger.error("Validation error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except APIError as e:
+        # Upstream failures such as rate limits come in bursts and their
+        # tracebacks say nothing new, so each is logged as one line
+        if isinstance(e, RateLimitError):
+            status_code = status.HTTP_429_TOO_MANY_REQUESTS
+        elif isinstance(e, APIConnectionError):
+            # Includes timeouts
+            status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        else:
+            status_code = status.HTTP_502_BAD_GATEWAY
+        logger.error("Failed to %s: OpenAI error: %s", action, e)
+        raise HTTPException(
+            status_code=status_code,
+            detail=f"Failed to {action}: {str(e)}"
+        )
     except Exception as e:
-        logger.error(f"Error extracting contact info: {str(e)}", exc_info=True)
+        logger.error("Failed to %s: %s", action, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to extract contact information: {str(e)}"
+            detail=f"Failed to {action}: {str(e)}"
         )
 
 
-@app.post(
-    "/extract/recipe",
-    response_model=RecipeExtractionResponse,
-    status_code=status.HTTP_200_OK,
-    responses={
-        400: {"model": ErrorResponse, "description": "Bad Request"},
-        500: {"model": ErrorResponse, "description": "Internal Server Error"},
-    },
-    tags=["Extraction"]
-)
-async def extract_recipe(request: ExtractionRequest):
+async def _extract_all(extraction_service: ExtractionService, texts: List[str], extraction: Dict) -> Tuple[List, float]:
     """
-    Extract recipe information from text.
-    Extracts title, ingredients, instructions, times, and servings.
+    Extract from each text concurrently.
 
     Args:
-        request: Text containing recipe information
+        extraction_service: Extraction service to use
+        texts: Texts to extract from
+        extraction: Extraction parameters for the endpoint
 
     Returns:
-        RecipeExtractionResponse with structured recipe data
+        Tuple of (extracted items in the order of the texts, mean confidence)
 
     Raises:
-        HTTPException: On extraction errors
+        Exception: The first extraction failure, once the remaining
+            extractions have been cancelled
     """
+    tasks = [
+        asyncio.create_task(extraction_service.extract_with_confidence(text=text, **extraction))
+        for text in texts
+    ]
     try:
-        logger.info("Extracting recipe...")
-
-        extraction_service = get_extraction_service()
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # The batch has failed, so stop the other OpenAI calls rather than
+        # letting them run on for results nobody will read
+        for task in tasks:
+            task.cancel()
+        raise
+    items = [item for item, _ in results]
+    confidence = sum(confidence for _, confidence in results) / len(results)
+    return items, confidence
 
-        # Extract recipe
-        recipe, confidence = extraction_service.extract_with_confidence(
-            text=request.text,
-            model=Recipe,
-            function_name="extract_recipe",
-            function_description="Extract recipe information including title, ingredients with quantities, step-by-step instructions, prep time, cook time, and servings",
-            system_prompt="You are an expert at parsing recipes. Extract all recipe details in a structured format."
-        )
 
-        return RecipeExtractionResponse(
-            recipe=recipe,
-            confidence=confidence
-        )
+class RequestSizeLimitMiddleware:
+    """
+    Reject requests whose body exceeds a size limit.
+
+    A declared Content-Length is checked up front, so oversized bodies are
+    refused before they are read. Bodies without one (chunked uploads) are
+    counted as they are received, and the request is answered with 413 as
+    soon as the limit is passed, before the body is parsed as JSON.
+    Implemented as plain ASGI middleware so other requests pass through
+    with little extra work.
+    """
 
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
-        logger.error(f"Error extracting recipe: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to extract recipe: {str(e)}"
-        )
+    def __init__(self, app, max_body_bytes: int):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application to wrap
+            max_body_bytes: Largest accepted request body
+        """
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    await self._reject(scope, receive, send, status.HTTP_400_BAD_REQUEST, "Invalid Content-Length header")
+                    return
+                if content_length > self.max_body_bytes:
+                    await self._reject(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        rejected = False
+
+        async def receive_limited():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    # Answer now and make the app see a disconnected client,
+                    # so it stops reading and its own response is dropped
+                    rejected = True
+                    await self._reject(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_unless_rejected(message):
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, receive_limited, send_unless_rejected)
+
+    @staticmethod
+    async def _reject(
+        scope,
+        receive,
+        send,
+        status_code: int = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        error: str = "Request body too large"
+    ):
+        """Send an error response without passing the request to the app."""
+        response = ORJSONResponse(status_code=status_code, content={"error": error})
+        await response(scope, receive, send)
 
 
-@app.post(
-    "/extract/event",
-    response_model=EventExtractionResponse,
-    status_code=status.HTTP_200_OK,
-    responses={
-        400: {"model": ErrorResponse, "description": "Bad Request"},
-        500: {"model": ErrorResponse, "description": "Internal Server Error"},
-    },
-    tags=["Extraction"]
+# Initialize FastAPI app
+settings = get_settings()
+app = FastAPI(
+    title=settings.api_title,
+    version=settings.api_version,
+    description=settings.api_description,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
-async def extract_event_info(request: ExtractionRequest):
-    """
-    Extract event information from text.
-    Extracts title, date, time, location, organizer, and attendees.
-
-    Args:
-        request: Text containing event information
+app.add_middleware(RequestSizeLimitMiddleware, max_body_bytes=settings.max_request_body_bytes)
+# Compresses larger responses such as recipes, products and batches for
+# clients that accept gzip; small ones like health checks are sent as is
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size, compresslevel=5)
 
-    Returns:
-        EventExtractionResponse with structured event data
 
-    Raises:
-        HTTPException: On extraction errors
-    """
-    try:
-        logger.info("Extracting event information...")
+# The health payload never changes, so it is built once
+_HEALTH = HealthResponse(status="healthy", version=settings.api_version)
 
-        extraction_service = get_extraction_service()
 
-        # Extract event info
-        event, confidence = extraction_service.extract_with_confidence(
-            text=request.text,
-            model=EventInfo,
-            function_name="extract_event_info",
-            function_description="Extract event information including title, description, date, time, location, organizer, and attendees",
-            system_prompt="You are an expert at extracting event details from text. Parse all event information accurately."
-        )
+@app.get("/", response_model=HealthResponse, tags=["Health"])
+async def root():
+    """Root endpoint - health check."""
+    return _HEALTH
 
-        return EventExtractionResponse(
-            events=[event],
-            confidence=confidence
-        )
 
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
-        logger.error(f"Error extracting event info: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to extract event information: {str(e)}"
-        )
+@app.get("/health", response_model=HealthResponse, tags=["Health"])
+async def health_check():
+    """Health check endpoint to verify service is running."""
+    return _HEALTH
 
 
-@app.post(
-    "/extract/product",
-    response_model=ProductExtractionResponse,
-    status_code=status.HTTP_200_OK,
-    responses={
-        400: {"model": ErrorResponse, "description": "Bad Request"},
-        500: {"model": ErrorResponse, "description": "Internal Server Error"},
-    },
-    tags=["Extraction"]
-)
-async def extract_product_info(request: ExtractionRequest):
+def _skip_contact_extraction(text: str) -> Optional[ContactExtractionResponse]:
     """
-    Extract product information from text.
-    Extracts name, category, price, brand, description, features, and specs.
+    Answer a contact extraction without calling OpenAI, if possible.
 
     Args:
-        request: Text containing product information
+        text: Text to extract contact information from
 
     Returns:
-        ProductExtractionResponse with structured product data
-
-    Raises:
-        HTTPException: On extraction errors
+        A response with no contacts if contact_prefilter is on and the text
+        has no email address or phone number, otherwise None
     """
-    try:
-        logger.info("Extracting product information...")
-
-        extraction_service = get_extraction_service()
-
-        # Extract product info
-        product, confidence = extraction_service.extract_with_confidence(
-            text=request.text,
-            model=ProductInfo,
-            function_name="extract_product_info",
-            function_description="Extract product information including name, category, price, brand, description, features, and specifications",
-            system_prompt="You are an expert at extracting product details from descriptions. Parse all product information in a structured format."
+    if settings.contact_prefilter and not _CONTACT_HINT.search(text):
+        logger.info("No email address or phone number found, skipping extraction")
+        return ContactExtractionResponse.model_construct(contacts=[], confidence=0.0)
+    return None
+
+
+# Endpoints per extraction type, each served at path and path + "/batch".
+# respond builds a response from one extracted item and its confidence,
+# respond_batch from the items of a batch and their mean confidence. The
+# service already validated the items, so responses are assembled with
+# model_construct and serialized without validating them again.
+_ROUTES = (
+    dict(
+        path="/extract/contact",
+        name="extract_contact_info",
+        description="Extract contact information from text.\nExtracts names, emails, phone numbers, companies, and addresses.",
+        action="extract contact information",
+        extraction=_CONTACT_EXTRACTION,
+        skip=_skip_contact_extraction,
+        response_model=ContactExtractionResponse,
+        respond=lambda contact, confidence: ContactExtractionResponse.model_construct(
+            contacts=[contact], confidence=confidence
+        ),
+        batch_response_model=ContactExtractionResponse,
+        respond_batch=lambda contacts, confidence: ContactExtractionResponse.model_construct(
+            contacts=contacts, confidence=confidence
         )
-
-        return ProductExtractionResponse(
-            products=[product],
-            confidence=confidence
+    ),
+    dict(
+        path="/extract/recipe",
+        name="extract_recipe",
+        description="Extract recipe information from text.\nExtracts title, ingredients, instructions, times, and servings.",
+        action="extract recipe",
+        extraction=_RECIPE_EXTRACTION,
+        response_model=RecipeExtractionResponse,
+        respond=lambda recipe, confidence: RecipeExtractionResponse.model_construct(
+            recipe=recipe, confidence=confidence
+        ),
+        batch_response_model=RecipeBatchExtractionResponse,
+        respond_batch=lambda recipes, confidence: RecipeBatchExtractionResponse.model_construct(
+            recipes=recipes, confidence=confidence
         )
-
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+    ),
+    dict(
+        path="/extract/event",
+        name="extract_event_info",
+        description="Extract event information from text.\nExtracts title, date, time, location, organizer, and attendees.",
+        action="extract event information",
+        extraction=_EVENT_EXTRACTION,
+        response_model=EventExtractionResponse,
+        respond=lambda event, confidence: EventExtractionResponse.model_construct(
+            events=[event], confidence=confidence
+        ),
+        batch_response_model=EventExtractionResponse,
+        respond_batch=lambda events, confidence: EventExtractionResponse.model_construct(
+            events=events, confidence=confidence
         )
-    except Exception as e:
-        logger.error(f"Error extracting product info: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to extract product information: {str(e)}"
+    ),
+    dict(
+        path="/extract/product",
+        name="extract_product_info",
+        description="Extract product information from text.\nExtracts name, category, price, brand, description, features, and specs.",
+        action="extract product information",
+        extraction=_PRODUCT_EXTRACTION,
+        response_model=ProductExtractionResponse,
+        respond=lambda product, confidence: ProductExtractionResponse.model_construct(
+            products=[product], confidence=confidence
+        ),
+        batch_response_model=ProductExtractionResponse,
+        respond_batch=lambda products, confidence: ProductExtractionResponse.model_construct(
+            products=products, confidence=confidence
         )
+    ),
+    dict(
+        path="/extract/sentiment",
+        name="extract_sentiment",
+        description="Analyze sentiment from text.\nExtracts overall sentiment, positive/negative aspects, and summary.",
+        action="analyze sentiment",
+        extraction=_SENTIMENT_EXTRACTION,
+        response_model=SentimentExtractionResponse,
+        respond=lambda analysis, _: SentimentExtractionResponse.model_construct(analysis=analysis),
+        batch_response_model=SentimentBatchExtractionResponse,
+        respond_batch=lambda analyses, _: SentimentBatchExtractionResponse.model_construct(analyses=analyses)
+    )
+)
 
+_ERROR_RESPONSES = {
+    400: {"model": ErrorResponse, "description": "Bad Request"},
+    429: {"model": ErrorResponse, "description": "Too Many Requests"},
+    500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    502: {"model": ErrorResponse, "description": "Bad Gateway"},
+    503: {"model": ErrorResponse, "description": "Service Unavailable"},
+}
 
-@app.post(
-    "/extract/sentiment",
-    response_model=SentimentExtractionResponse,
-    status_code=status.HTTP_200_OK,
-    responses={
-        400: {"model": ErrorResponse, "description": "Bad Request"},
-        500: {"model": ErrorResponse, "description": "Internal Server Error"},
-    },
-    tags=["Extraction"]
-)
-async def extract_sentiment(request: ExtractionRequest):
+
+async def _extract(route: Dict, texts: List[str], extraction_service: ExtractionService, batch: bool) -> Response:
     """
-    Analyze sentiment from text.
-    Extracts overall sentiment, positive/negative aspects, and summary.
+    Serve an extraction request.
 
     Args:
-        request: Text to analyze sentiment from
+        route: Endpoint of the extraction type, from _ROUTES
+        texts: Texts of the request
+        extraction_service: Extraction service created at startup
+        batch: Whether the request came to the batch endpoint
 
     Returns:
-        SentimentExtractionResponse with sentiment analysis
+        The endpoint's response, serialized to JSON
 
     Raises:
         HTTPException: On extraction errors
     """
-    try:
-        logger.info("Analyzing sentiment...")
-
-        extraction_service = get_extraction_service()
-
-        # Extract sentiment
-        sentiment, confidence = extraction_service.extract_with_confidence(
-            text=request.text,
-            model=SentimentAnalysis,
-            function_name="analyze_sentiment",
-            function_description="Analyze sentiment from text, identifying overall sentiment (positive/negative/neutral/mixed), positive and negative aspects, and providing a summary",
-            system_prompt="You are an expert at sentiment analysis. Accurately identify the overall sentiment and extract specific positive and negative aspects mentioned in the text."
-        )
-
-        return SentimentExtractionResponse(
-            analysis=sentiment
-        )
-
-    except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
-    except Exception as e:
-        logger.error(f"Error analyzing sentiment: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to analyze sentiment: {str(e)}"
-        )
+    logger.info("Serving %s for %s text(s)...", route["name"], len(texts))
+
+    if batch:
+        with _http_errors(route["action"]):
+            items, confidence = await _extract_all(extraction_service, texts, route["extraction"])
+        return _json_response(route["respond_batch"](items, confidence))
+
+    skip = route.get("skip")
+    response = skip(texts[0]) if skip else None
+    if response is None:
+        with _http_errors(route["action"]):
+            item, confidence = await extraction_service.extract_with_confidence(
+                text=texts[0],
+                **route["extraction"]
+            )
+        response = route["respond"](item, confidence)
+    return _json_response(response)
+
+
+def _extraction_endpoint(route: Dict, batch: bool):
+    """Create the endpoint function serving a route for one text or a batch."""
+    if batch:
+        async def endpoint(
+            request: BatchExtractionRequest,
+            extraction_service: ExtractionService = Depends(get_service)
+        ):
+            return await _extract(route, request.texts, extraction_service, batch=True)
+    else:
+        async def endpoint(
+            request: ExtractionRequest,
+            extraction_service: ExtractionService = Depends(get_service)
+        ):
+            return await _extract(route, [request.text], extraction_service, batch=False)
+    return endpoint
+
+
+# All single-text routes first, then the batch ones, keeping the docs' order
+for _batch in (False, True):
+    for _route in _ROUTES:
+        app.post(
+            _route["path"] + "/batch" if _batch else _route["path"],
+            response_model=_route["batch_response_model" if _batch else "response_model"],
+            status_code=status.HTTP_200_OK,
+            responses=_ERROR_RESPONSES,
+            # The name also gives the summary and operation id in the docs
+            name=_route["name"] + "_batch" if _batch else _route["name"],
+            description=(
+                f"Same as {_route['path']}, for several texts at once.\n"
+                "The texts are extracted concurrently, and one failure fails the batch."
+                if _batch else _route["description"]
+            ),
+            tags=["Extraction"]
+        )(_extraction_endpoint(_route, _batch))
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled exceptions."""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"error": "Internal server error", "detail": str(exc)}
     )
@@ -381,6 +523,10 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level=settings.log_level.lower()
+        # uvicorn ignores workers when reload is enabled
+        workers=int(os.getenv("WEB_CONCURRENCY", settings.workers)),
+        reload=settings.reload,
+        log_level=settings.log_level.lower(),
+        loop="uvloop",
+        http="httptools"
     )
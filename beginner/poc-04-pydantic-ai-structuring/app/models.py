@@ -1,24 +1,42 @@
 """
 Pydantic models for structured AI outputs.
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field, EmailStr
-from datetime import datetime
+from typing import Annotated, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 from enum import Enum
 
 
 # Request/Response models for API
 
+# Input text for extraction; whitespace-only text is rejected without calling OpenAI
+ExtractionText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=10000)]
+
+
 class ExtractionRequest(BaseModel):
     """Base request for extraction."""
-    text: str = Field(..., min_length=1, max_length=10000, description="Text to extract information from")
+    text: ExtractionText = Field(..., description="Text to extract information from")
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "text": "Contact John Doe at john.doe@example.com or call (555) 123-4567"
+        }
+    })
+
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "text": "Contact John Doe at john.doe@example.com or call (555) 123-4567"
-            }
+class BatchExtractionRequest(BaseModel):
+    """Request for extracting from several texts at once."""
+    texts: List[ExtractionText] = Field(
+        ..., min_length=1, max_length=20, description="Texts to extract information from"
+    )
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "texts": [
+                "Contact John Doe at john.doe@example.com or call (555) 123-4567",
+                "Reach Jane Smith at Acme Corp, jane@acme.com"
+            ]
         }
+    })
 
 
 # Structured output models for different extraction types
@@ -31,16 +49,15 @@ class ContactInfo(BaseModel):
     company: Optional[str] = Field(None, description="Company name")
     address: Optional[str] = Field(None, description="Physical address")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "John Doe",
-                "email": "john.doe@example.com",
-                "phone": "(555) 123-4567",
-                "company": "Acme Corp",
-                "address": "123 Main St, City, State 12345"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "name": "John Doe",
+            "email": "john.doe@example.com",
+            "phone": "(555) 123-4567",
+            "company": "Acme Corp",
+            "address": "123 Main St, City, State 12345"
         }
+    })
 
 
 class ContactExtractionResponse(BaseModel):
@@ -66,21 +83,20 @@ class Recipe(BaseModel):
     cook_time: Optional[str] = Field(None, description="Cooking time")
     servings: Optional[str] = Field(None, description="Number of servings")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "title": "Chocolate Chip Cookies",
-                "description": "Classic homemade cookies",
-                "ingredients": [
-                    {"name": "flour", "quantity": "2 cups", "preparation": "sifted"},
-                    {"name": "butter", "quantity": "1 cup", "preparation": "softened"}
-                ],
-                "instructions": ["Preheat oven to 350°F", "Mix ingredients", "Bake for 10 minutes"],
-                "prep_time": "15 minutes",
-                "cook_time": "10 minutes",
-                "servings": "24 cookies"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "title": "Chocolate Chip Cookies",
+            "description": "Classic homemade cookies",
+            "ingredients": [
+                {"name": "flour", "quantity": "2 cups", "preparation": "sifted"},
+                {"name": "butter", "quantity": "1 cup", "preparation": "softened"}
+            ],
+            "instructions": ["Preheat oven to 350°F", "Mix ingredients", "Bake for 10 minutes"],
+            "prep_time": "15 minutes",
+            "cook_time": "10 minutes",
+            "servings": "24 cookies"
         }
+    })
 
 
 class RecipeExtractionResponse(BaseModel):
@@ -89,6 +105,12 @@ class RecipeExtractionResponse(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0, description="Confidence score")
 
 
+class RecipeBatchExtractionResponse(BaseModel):
+    """Response for batch recipe extraction."""
+    recipes: List[Recipe] = Field(..., description="Extracted recipes, in the order of the texts")
+    confidence: float = Field(..., ge=0.0, le=1.0, description="Mean confidence score")
+
+
 class EventInfo(BaseModel):
     """Event information extracted from text."""
     title: str = Field(..., description="Event title")
@@ -99,18 +121,17 @@ class EventInfo(BaseModel):
     organizer: Optional[str] = Field(None, description="Event organizer")
     attendees: Optional[List[str]] = Field(default_factory=list, description="List of attendees")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "title": "Team Meeting",
-                "description": "Quarterly planning session",
-                "date": "2024-01-15",
-                "time": "2:00 PM - 3:30 PM",
-                "location": "Conference Room A",
-                "organizer": "Jane Smith",
-                "attendees": ["John Doe", "Alice Johnson"]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "title": "Team Meeting",
+            "description": "Quarterly planning session",
+            "date": "2024-01-15",
+            "time": "2:00 PM - 3:30 PM",
+            "location": "Conference Room A",
+            "organizer": "Jane Smith",
+            "attendees": ["John Doe", "Alice Johnson"]
         }
+    })
 
 
 class EventExtractionResponse(BaseModel):
@@ -139,20 +160,19 @@ class ProductInfo(BaseModel):
     brand: Optional[str] = Field(None, description="Brand name")
     description: Optional[str] = Field(None, description="Product description")
     features: Optional[List[str]] = Field(default_factory=list, description="Key features")
-    specifications: Optional[dict] = Field(default_factory=dict, description="Technical specifications")
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "Wireless Headphones",
-                "category": "electronics",
-                "price": "$99.99",
-                "brand": "AudioTech",
-                "description": "High-quality wireless headphones with noise cancellation",
-                "features": ["Bluetooth 5.0", "30-hour battery", "Active noise cancellation"],
-                "specifications": {"weight": "250g", "battery": "2000mAh"}
-            }
+    specifications: Optional[Dict[str, str]] = Field(default_factory=dict, description="Technical specifications")
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "name": "Wireless Headphones",
+            "category": "electronics",
+            "price": "$99.99",
+            "brand": "AudioTech",
+            "description": "High-quality wireless headphones with noise cancellation",
+            "features": ["Bluetooth 5.0", "30-hour battery", "Active noise cancellation"],
+            "specifications": {"weight": "250g", "battery": "2000mAh"}
         }
+    })
 
 
 class ProductExtractionResponse(BaseModel):
@@ -177,16 +197,15 @@ class SentimentAnalysis(BaseModel):
     negative_aspects: Optional[List[str]] = Field(default_factory=list, description="Negative aspects mentioned")
     summary: Optional[str] = Field(None, description="Brief summary of sentiment")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "sentiment": "positive",
-                "confidence": 0.92,
-                "positive_aspects": ["Great quality", "Fast shipping"],
-                "negative_aspects": ["Expensive"],
-                "summary": "Overall positive review with minor price concerns"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "sentiment": "positive",
+            "confidence": 0.92,
+            "positive_aspects": ["Great quality", "Fast shipping"],
+            "negative_aspects": ["Expensive"],
+            "summary": "Overall positive review with minor price concerns"
         }
+    })
 
 
 class SentimentExtractionResponse(BaseModel):
@@ -194,6 +213,11 @@ class SentimentExtractionResponse(BaseModel):
     analysis: SentimentAnalysis = Field(..., description="Sentiment analysis result")
 
 
+class SentimentBatchExtractionResponse(BaseModel):
+    """Response for batch sentiment analysis."""
+    analyses: List[SentimentAnalysis] = Field(..., description="Sentiment analysis results, in the order of the texts")
+
+
 class KeyValuePair(BaseModel):
     """Key-value pair for generic extraction."""
     key: str = Field(..., description="Key name")
@@ -214,13 +238,12 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Service status")
     version: str = Field(..., description="API version")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "healthy",
-                "version": "1.0.0"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "status": "healthy",
+            "version": "1.0.0"
         }
+    })
 
 
 class ErrorResponse(BaseModel):
@@ -228,10 +251,9 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "error": "Extraction failed",
-                "detail": "Unable to parse the provided text"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "error": "Extraction failed",
+            "detail": "Unable to parse the provided text"
         }
+    })
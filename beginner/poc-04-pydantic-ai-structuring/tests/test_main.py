@@ -1,11 +1,15 @@
 """
 Unit tests for the Pydantic AI Structuring application.
 """
+import asyncio
+
+import httpx
+import openai
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
-from app.main import app
+from app.main import app, settings
 from app.models import (
     ContactInfo,
     Recipe,
@@ -17,11 +21,15 @@ from app.models import (
     ProductCategory
 )
 
+# Request attached to the OpenAI errors raised in tests
+_OPENAI_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def client():
-    """Create a test client."""
-    return TestClient(app)
+    """Create a test client shared by the module, running the app's lifespan once."""
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture
@@ -147,12 +155,131 @@ def test_extract_contact_info_success(mock_extract, client, mock_contact_extract
     assert data["confidence"] == 0.95
 
 
+@patch('app.extraction_service.ExtractionService.extract_with_confidence')
+def test_extract_contact_info_batch(mock_extract, client, mock_contact_extraction):
+    """Test batch contact extraction returns one contact per text."""
+    contact, _ = mock_contact_extraction
+    mock_extract.side_effect = [(contact, 1.0), (contact, 0.5)]
+
+    request_data = {
+        "texts": [
+            "Contact John Doe at john.doe@example.com",
+            "John Doe works at Acme Corp"
+        ]
+    }
+    response = client.post("/extract/contact/batch", json=request_data)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["contacts"]) == 2
+    assert data["confidence"] == 0.75
+    assert mock_extract.call_count == 2
+
+
+@patch('app.extraction_service.ExtractionService.extract_with_confidence')
+def test_extract_batch_fails_when_one_text_fails(mock_extract, client, mock_contact_extraction):
+    """Test that a batch with one failed text is answered with that failure."""
+    mock_extract.side_effect = [mock_contact_extraction, ValueError("Extraction failed")]
+
+    request_data = {
+        "texts": [
+            "Contact John Doe at john.doe@example.com",
+            "Contact Jane Doe at jane.doe@example.com"
+        ]
+    }
+    response = client.post("/extract/contact/batch", json=request_data)
+
+    assert response.status_code == 400
+
+
+def test_extract_all_cancels_remaining_texts_on_failure(mock_contact_extraction):
+    """Test that the other extractions of a batch are cancelled once one fails."""
+    from app.main import _CONTACT_EXTRACTION, _extract_all
+    cancelled = []
+
+    async def extract_with_confidence(text, **kwargs):
+        if text == "bad":
+            raise ValueError("Extraction failed")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+        return mock_contact_extraction
+
+    async def extract_batch():
+        service = Mock(extract_with_confidence=extract_with_confidence)
+        with pytest.raises(ValueError):
+            await _extract_all(service, ["first", "bad", "last"], _CONTACT_EXTRACTION)
+        # Let the cancelled tasks finish; asyncio.run would cancel any
+        # still running when it returns, so check before then
+        await asyncio.sleep(0)
+        return sorted(cancelled)
+
+    assert asyncio.run(extract_batch()) == ["first", "last"]
+
+
 def test_extract_contact_invalid_request(client):
     """Test contact extraction with invalid request."""
     response = client.post("/extract/contact", json={"text": ""})
     assert response.status_code == 422  # Validation error
 
 
+@patch('app.extraction_service.ExtractionService.extract_with_confidence')
+def test_contact_prefilter_skips_text_without_contact_details(mock_extract, client):
+    """Test that the contact prefilter answers without calling OpenAI."""
+    with patch.object(settings, "contact_prefilter", True):
+        response = client.post("/extract/contact", json={"text": "The weather was lovely today."})
+
+    assert response.status_code == 200
+    assert response.json() == {"contacts": [], "confidence": 0.0}
+    mock_extract.assert_not_called()
+
+
+def test_extract_whitespace_only_text_rejected(client):
+    """Test that whitespace-only text fails validation."""
+    response = client.post("/extract/contact", json={"text": "   \n  "})
+    assert response.status_code == 422
+
+
+def test_oversized_request_body_rejected(client):
+    """Test that bodies above the size limit are rejected before parsing."""
+    response = client.post("/extract/contact", content=b"x" * (2 * 1024 * 1024))
+    assert response.status_code == 413
+
+
+@patch('app.extraction_service.ExtractionService.extract_with_confidence')
+def test_oversized_chunked_request_body_rejected(mock_extract, client):
+    """Test that bodies without a Content-Length are cut off once they pass the size limit."""
+    def chunks():
+        for _ in range(32):
+            yield b'{"text": "' + b"x" * 65536
+
+    response = client.post("/extract/contact", content=chunks())
+
+    assert response.status_code == 413
+    assert response.json() == {"error": "Request body too large"}
+    mock_extract.assert_not_called()
+
+
+def test_invalid_content_length_rejected():
+    """Test that a non-numeric Content-Length is answered with 400 instead of an error."""
+    from app.main import RequestSizeLimitMiddleware
+
+    inner_app = AsyncMock()
+    middleware = RequestSizeLimitMiddleware(inner_app, max_body_bytes=1024)
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": [(b"content-length", b"lots")]}
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, AsyncMock(), send))
+
+    assert sent[0]["status"] == 400
+    inner_app.assert_not_called()
+
+
 @patch('app.extraction_service.ExtractionService.extract_with_confidence')
 def test_extract_recipe_success(mock_extract, client, mock_recipe_extraction):
     """Test successful recipe extraction."""
@@ -218,6 +345,25 @@ def test_extract_product_info_success(mock_extract, client, mock_product_extract
     assert data["products"][0]["price"] == "$99.99"
     assert data["products"][0]["brand"] == "AudioTech"
     assert data["confidence"] == 0.90
+    # Responses are built without revalidation, so check nested types survive
+    assert data["products"][0]["category"] == "electronics"
+    assert data["products"][0]["specifications"] == {"weight": "250g"}
+
+
+@patch('app.extraction_service.ExtractionService.extract_with_confidence')
+def test_large_responses_are_compressed(mock_extract, client, mock_product_extraction):
+    """Test that responses above the gzip minimum size are compressed."""
+    mock_extract.return_value = mock_product_extraction
+
+    response = client.post(
+        "/extract/product/batch",
+        json={"texts": ["Wireless Headphones by AudioTech"] * 10},
+        headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["products"]) == 10
 
 
 @patch('app.extraction_service.ExtractionService.extract_with_confidence')
@@ -241,6 +387,26 @@ def test_extract_sentiment_success(mock_extract, client, mock_sentiment_extracti
     assert "Great quality" in data["analysis"]["positive_aspects"]
 
 
+@patch('app.extraction_service.ExtractionService.extract_with_confidence')
+def test_extract_sentiment_batch(mock_extract, client, mock_sentiment_extraction):
+    """Test batch sentiment analysis returns one analysis per text."""
+    mock_extract.return_value = mock_sentiment_extraction
+
+    response = client.post("/extract/sentiment/batch", json={"texts": ["Great product", "Love it"]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["analyses"]) == 2
+    assert data["analyses"][0]["sentiment"] == "positive"
+
+
+def test_all_batch_endpoints_exist(client):
+    """Test that every extraction endpoint has a batch endpoint."""
+    for endpoint in ["contact", "recipe", "event", "product", "sentiment"]:
+        response = client.post(f"/extract/{endpoint}/batch", json={"texts": []})
+        assert response.status_code == 422  # Not 404
+
+
 @patch('app.extraction_service.ExtractionService.extract_with_confidence')
 def test_extraction_error_handling(mock_extract, client):
     """Test error handling when extraction fails."""
@@ -255,6 +421,22 @@ def test_extraction_error_handling(mock_extract, client):
     assert response.status_code == 400
 
 
+@pytest.mark.parametrize("error, status_code", [
+    (openai.RateLimitError("Rate limit reached", response=httpx.Response(429, request=_OPENAI_REQUEST), body=None), 429),
+    (openai.APITimeoutError(request=_OPENAI_REQUEST), 503),
+    (openai.APIConnectionError(request=_OPENAI_REQUEST), 503),
+    (openai.InternalServerError("Server error", response=httpx.Response(500, request=_OPENAI_REQUEST), body=None), 502),
+])
+@patch('app.extraction_service.ExtractionService.extract_with_confidence')
+def test_openai_errors_mapped_to_status(mock_extract, client, error, status_code):
+    """Test that OpenAI failures are answered with a status matching their cause."""
+    mock_extract.side_effect = error
+
+    response = client.post("/extract/recipe", json={"text": "Some text"})
+
+    assert response.status_code == status_code
+
+
 def test_all_extraction_endpoints_exist(client):
     """Test that all extraction endpoints are accessible."""
     endpoints = [
@@ -269,3 +451,84 @@ def test_all_extraction_endpoints_exist(client):
         # Check endpoint exists (will fail validation, but endpoint should exist)
         response = client.post(endpoint, json={"text": ""})
         assert response.status_code in [200, 400, 422]  # Not 404
+
+
+def test_extract_structured_data_parses_json_content():
+    """Test that the structured output content is validated into the model."""
+    from app.extraction_service import ExtractionService
+    service = ExtractionService()
+    message = Mock(content='{"title": "Cookies", "ingredients": [{"name": "flour", "quantity": "2 cups"}]}', refusal=None)
+
+    async def extract():
+        try:
+            return await service.extract_structured_data(
+                text="Cookies: mix 2 cups of flour...",
+                model=Recipe,
+                function_name="extract_recipe",
+                function_description="Extract recipe information"
+            )
+        finally:
+            await service.close()
+
+    with patch.object(
+        service.client.chat.completions, "create",
+        AsyncMock(return_value=Mock(choices=[Mock(message=message)]))
+    ) as mock_create:
+        result = asyncio.run(extract())
+
+    assert result.ingredients[0] == Ingredient(name="flour", quantity="2 cups")
+    response_format = mock_create.call_args.kwargs["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["schema"] == Recipe.model_json_schema()
+
+
+def test_extract_structured_data_passes_openai_errors_on():
+    """Test that OpenAI errors are raised as they are, not wrapped in ValueError."""
+    from app.extraction_service import ExtractionService
+    service = ExtractionService()
+    error = openai.RateLimitError("Rate limit reached", response=httpx.Response(429, request=_OPENAI_REQUEST), body=None)
+
+    async def extract():
+        try:
+            return await service.extract_structured_data(
+                text="Cookies",
+                model=Recipe,
+                function_name="extract_recipe",
+                function_description="Extract recipe information"
+            )
+        finally:
+            await service.close()
+
+    with patch.object(service.client.chat.completions, "create", AsyncMock(side_effect=error)):
+        with pytest.raises(openai.RateLimitError):
+            asyncio.run(extract())
+
+
+def test_extract_with_confidence_caches_repeated_text():
+    """Test that extracting the same text twice calls OpenAI once."""
+    from app.extraction_service import ExtractionService
+    service = ExtractionService()
+    message = Mock(content='{"title": "Cookies"}', refusal=None)
+
+    async def extract_twice():
+        try:
+            return [
+                await service.extract_with_confidence(
+                    text="Cookies",
+                    model=Recipe,
+                    function_name="extract_recipe",
+                    function_description="Extract recipe information"
+                )
+                for _ in range(2)
+            ]
+        finally:
+            await service.close()
+
+    with patch.object(
+        service.client.chat.completions, "create",
+        AsyncMock(return_value=Mock(choices=[Mock(message=message)]))
+    ) as mock_create:
+        first, second = asyncio.run(extract_twice())
+
+    assert first == second
+    assert mock_create.call_count == 1
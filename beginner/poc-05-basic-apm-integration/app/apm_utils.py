@@ -1,21 +1,50 @@
 """
 Utilities for working with ElasticAPM.
 """
+import asyncio
 import logging
+import sys
+import threading
+import time
+import weakref
 from typing import Optional, Dict, Any
 from functools import wraps
 import elasticapm
 
+from app.config import get_settings
+
 logger = logging.getLogger(__name__)
 
+# The APM client, once one has been created. It is looked up again until
+# then, since the client is created after this module is imported.
+_client: Optional[elasticapm.Client] = None
+
+
+def _get_client() -> Optional[elasticapm.Client]:
+    """Return the APM client, or None if there is none yet."""
+    global _client
+    if _client is None:
+        _client = elasticapm.get_client()
+    return _client
+
+
+def reset_client_cache():
+    """Forget the cached APM client (for tests that replace it)."""
+    global _client
+    _client = None
 
-def capture_span(span_name: str, span_type: str = "app"):
+
+def capture_span(span_name: str, span_type: str = "app", min_duration_ms: Optional[float] = None):
     """
     Decorator to capture a function as an APM span.
 
     Args:
         span_name: Name of the span
         span_type: Type of span (app, db, cache, external, etc.)
+        min_duration_ms: Only record calls taking at least this long
+            (defaults to the apm_span_min_duration_ms setting). Such calls
+            are timed and recorded once they finish, so spans they start
+            are attached to the enclosing span instead.
 
     Usage:
         @capture_span("process_data", "app.processing")
@@ -23,32 +52,80 @@ def capture_span(span_name: str, span_type: str = "app"):
             # function code
             pass
     """
+    # Names built at runtime (e.g. f-strings) then share one string object
+    # across all spans; literals are interned by the compiler already
+    span_name = sys.intern(span_name)
+    span_type = sys.intern(span_type)
+
     def decorator(func):
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            client = elasticapm.get_client()
-            if client:
+        settings = get_settings()
+        # With APM disabled there is nothing to capture, so the function is
+        # used as is rather than paying for a wrapper on every call
+        if not settings.elastic_apm_enabled:
+            return func
+
+        threshold_ms = settings.apm_span_min_duration_ms if min_duration_ms is None else min_duration_ms
+        if threshold_ms > 0:
+            return _capture_slow_calls(func, span_name, span_type, int(threshold_ms * 1_000_000))
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _get_client() is None:
+                    return await func(*args, **kwargs)
                 with elasticapm.capture_span(span_name, span_type=span_type):
                     return await func(*args, **kwargs)
-            return await func(*args, **kwargs)
+
+            return async_wrapper
 
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            client = elasticapm.get_client()
-            if client:
-                with elasticapm.capture_span(span_name, span_type=span_type):
-                    return func(*args, **kwargs)
-            return func(*args, **kwargs)
+            if _get_client() is None:
+                return func(*args, **kwargs)
+            with elasticapm.capture_span(span_name, span_type=span_type):
+                return func(*args, **kwargs)
 
-        # Return appropriate wrapper based on function type
-        import asyncio
-        if asyncio.iscoroutinefunction(func):
-            return async_wrapper
         return sync_wrapper
 
     return decorator
 
 
+def _record_span(span_name: str, span_type: str, started_at: float, duration_ns: int):
+    """Record a span for a call that has already finished."""
+    with elasticapm.capture_span(span_name, span_type=span_type, start=started_at, duration=duration_ns / 1e9):
+        pass
+
+
+def _capture_slow_calls(func, span_name: str, span_type: str, threshold_ns: int):
+    """Wrap func to record a span only for calls taking at least threshold_ns."""
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started_at = time.time()
+            start_ns = time.perf_counter_ns()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                duration_ns = time.perf_counter_ns() - start_ns
+                if duration_ns >= threshold_ns and _get_client() is not None:
+                    _record_span(span_name, span_type, started_at, duration_ns)
+
+        return async_wrapper
+
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        started_at = time.time()
+        start_ns = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            duration_ns = time.perf_counter_ns() - start_ns
+            if duration_ns >= threshold_ns and _get_client() is not None:
+                _record_span(span_name, span_type, started_at, duration_ns)
+
+    return sync_wrapper
+
+
 def set_custom_context(data: Dict[str, Any]):
     """
     Set custom context data for the current transaction.
@@ -56,9 +133,9 @@ def set_custom_context(data: Dict[str, Any]):
     Args:
         data: Dictionary of custom context data
     """
-    client = elasticapm.get_client()
-    if client:
-        elasticapm.set_custom_context(data)
+    if _get_client() is None:
+        return
+    elasticapm.set_custom_context(data)
 
 
 def set_user_context(
@@ -74,13 +151,13 @@ def set_user_context(
         username: Username
         email: User email
     """
-    client = elasticapm.get_client()
-    if client:
-        elasticapm.set_user_context(
-            user_id=user_id,
-            username=username,
-            email=email
-        )
+    if _get_client() is None:
+        return
+    elasticapm.set_user_context(
+        user_id=user_id,
+        username=username,
+        email=email
+    )
 
 
 def label_transaction(**labels):
@@ -90,10 +167,9 @@ def label_transaction(**labels):
     Args:
         **labels: Key-value pairs to add as labels
     """
-    client = elasticapm.get_client()
-    if client:
-        for key, value in labels.items():
-            elasticapm.label(**{key: value})
+    if _get_client() is None:
+        return
+    elasticapm.label(**labels)
 
 
 def capture_message(message: str, level: str = "info", custom: Optional[Dict] = None):
@@ -105,9 +181,10 @@ def capture_message(message: str, level: str = "info", custom: Optional[Dict] =
         level: Log level (debug, info, warning, error)
         custom: Custom data to attach
     """
-    client = elasticapm.get_client()
-    if client:
-        client.capture_message(message, level=level, custom=custom)
+    client = _get_client()
+    if client is None:
+        return
+    client.capture_message(message, level=level, custom=custom)
 
 
 def capture_exception(exc: Exception, custom: Optional[Dict] = None, handled: bool = True):
@@ -119,9 +196,10 @@ def capture_exception(exc: Exception, custom: Optional[Dict] = None, handled: bo
         custom: Custom data to attach
         handled: Whether the exception was handled
     """
-    client = elasticapm.get_client()
-    if client:
-        client.capture_exception(exc_info=(type(exc), exc, exc.__traceback__), custom=custom, handled=handled)
+    client = _get_client()
+    if client is None:
+        return
+    client.capture_exception(exc_info=(type(exc), exc, exc.__traceback__), custom=custom, handled=handled)
 
 
 def get_trace_id() -> Optional[str]:
@@ -131,11 +209,12 @@ def get_trace_id() -> Optional[str]:
     Returns:
         Current trace ID or None if not available
     """
-    client = elasticapm.get_client()
-    if client:
-        transaction = client.get_transaction()
-        if transaction:
-            return transaction.trace_parent.trace_id
+    client = _get_client()
+    if client is None:
+        return None
+    transaction = client.get_transaction()
+    if transaction:
+        return transaction.trace_parent.trace_id
     return None
 
 
@@ -146,40 +225,92 @@ def get_transaction_id() -> Optional[str]:
     Returns:
         Current transaction ID or None if not available
     """
-    client = elasticapm.get_client()
-    if client:
-        transaction = client.get_transaction()
-        if transaction:
-            return transaction.id
+    client = _get_client()
+    if client is None:
+        return None
+    transaction = client.get_transaction()
+    if transaction:
+        return transaction.id
     return None
 
 
+class _Shard:
+    """One thread's request counters: [count, total response time ns, errors]."""
+
+    __slots__ = ("values", "__weakref__")
+
+    def __init__(self):
+        self.values = [0, 0, 0]
+
+
 class APMMetrics:
-    """Simple in-memory metrics tracker for demonstration."""
+    """
+    Simple in-memory metrics tracker for demonstration.
+
+    Each thread records into its own shard, so recording needs no lock and
+    concurrent requests cannot lose increments. Reading sums the shards plus
+    the totals left by threads that have exited, so a snapshot may miss
+    requests that are being recorded at that moment.
+    """
 
     def __init__(self):
-        self.total_requests = 0
-        self.total_response_time_ms = 0.0
-        self.error_count = 0
-
-    def record_request(self, response_time_ms: float, is_error: bool = False):
-        """Record a request metric."""
-        self.total_requests += 1
-        self.total_response_time_ms += response_time_ms
+        self._local = threading.local()
+        self._shards: "weakref.WeakSet[_Shard]" = weakref.WeakSet()
+        # Totals merged in from the shards of exited threads
+        self._retired = [0, 0, 0]
+        # Guards the shard set and retired totals, not the shards themselves.
+        # Reentrant because a shard finalizer can fire while it is held.
+        self._lock = threading.RLock()
+
+    def _shard(self) -> _Shard:
+        """Return the calling thread's shard, creating it on first use."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _Shard()
+            with self._lock:
+                self._shards.add(shard)
+            # The shard is dropped with the thread; keep its counts
+            weakref.finalize(shard, self._retire, shard.values)
+            self._local.shard = shard
+            return shard
+
+    def _retire(self, values: list):
+        """Merge an exited thread's counts into the retired totals."""
+        with self._lock:
+            for i, value in enumerate(values):
+                self._retired[i] += value
+
+    def record_request(self, response_time_ns: int, is_error: bool = False):
+        """Record a request metric, timed in nanoseconds (time.perf_counter_ns)."""
+        values = self._shard().values
+        values[0] += 1
+        values[1] += response_time_ns
         if is_error:
-            self.error_count += 1
+            values[2] += 1
 
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics."""
+        # Snapshot the shards before the retired totals: a shard in the
+        # snapshot can't retire until it is dropped below, outside the lock
+        with self._lock:
+            shards = list(self._shards)
+            totals = list(self._retired)
+        for shard in shards:
+            for i, value in enumerate(shard.values):
+                totals[i] += value
+        del shards
+        total_requests, total_response_time_ns, error_count = totals
+
         avg_response_time = (
-            self.total_response_time_ms / self.total_requests
-            if self.total_requests > 0
+            total_response_time_ns / total_requests / 1_000_000
+            if total_requests > 0
             else 0.0
         )
         return {
-            "total_requests": self.total_requests,
+            "total_requests": total_requests,
             "avg_response_time_ms": round(avg_response_time, 2),
-            "error_count": self.error_count
+            "error_count": error_count
         }
 
 
@@ -25,6 +25,7 @@ class Settings(BaseSettings):
     apm_capture_headers: bool = True
     apm_transaction_sample_rate: float = 1.0  # 1.0 = 100% of transactions
     apm_span_frames_min_duration: str = "5ms"  # Minimum duration to capture stack frames
+    apm_span_min_duration_ms: float = 0.0  # Minimum duration to record a custom span (0 = all)
 
     # Application Configuration
     log_level: str = "INFO"
@@ -2,7 +2,7 @@
 Pydantic models for APM demonstration endpoints.
 """
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 
@@ -12,14 +12,13 @@ class TaskRequest(BaseModel):
     description: Optional[str] = Field(None, max_length=1000, description="Task description")
     priority: Optional[str] = Field(default="medium", description="Task priority (low, medium, high)")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "title": "Complete project documentation",
-                "description": "Write comprehensive documentation for the project",
-                "priority": "high"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "title": "Complete project documentation",
+            "description": "Write comprehensive documentation for the project",
+            "priority": "high"
         }
+    })
 
 
 class TaskResponse(BaseModel):
@@ -31,17 +30,16 @@ class TaskResponse(BaseModel):
     created_at: datetime = Field(..., description="Creation timestamp")
     processing_time_ms: float = Field(..., description="Time taken to process request in milliseconds")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "id": "task-123",
-                "title": "Complete project documentation",
-                "description": "Write comprehensive documentation",
-                "priority": "high",
-                "created_at": "2024-01-15T10:30:00",
-                "processing_time_ms": 45.2
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "id": "task-123",
+            "title": "Complete project documentation",
+            "description": "Write comprehensive documentation",
+            "priority": "high",
+            "created_at": "2024-01-15T10:30:00",
+            "processing_time_ms": 45.2
         }
+    })
 
 
 class DataProcessingRequest(BaseModel):
@@ -49,13 +47,12 @@ class DataProcessingRequest(BaseModel):
     items: List[str] = Field(..., min_length=1, max_length=100, description="List of items to process")
     delay_ms: Optional[int] = Field(default=100, ge=0, le=5000, description="Simulated processing delay in ms")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "items": ["item1", "item2", "item3"],
-                "delay_ms": 100
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "items": ["item1", "item2", "item3"],
+            "delay_ms": 100
         }
+    })
 
 
 class DataProcessingResponse(BaseModel):
@@ -64,14 +61,13 @@ class DataProcessingResponse(BaseModel):
     total_time_ms: float = Field(..., description="Total processing time in milliseconds")
     items: List[str] = Field(..., description="Processed items")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "processed_count": 3,
-                "total_time_ms": 305.7,
-                "items": ["ITEM1", "ITEM2", "ITEM3"]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "processed_count": 3,
+            "total_time_ms": 305.7,
+            "items": ["ITEM1", "ITEM2", "ITEM3"]
         }
+    })
 
 
 class HealthResponse(BaseModel):
@@ -81,15 +77,14 @@ class HealthResponse(BaseModel):
     apm_enabled: bool = Field(..., description="Whether APM is enabled")
     timestamp: datetime = Field(..., description="Current timestamp")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "healthy",
-                "version": "1.0.0",
-                "apm_enabled": True,
-                "timestamp": "2024-01-15T10:30:00"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "status": "healthy",
+            "version": "1.0.0",
+            "apm_enabled": True,
+            "timestamp": "2024-01-15T10:30:00"
         }
+    })
 
 
 class MetricsResponse(BaseModel):
@@ -98,14 +93,13 @@ class MetricsResponse(BaseModel):
     avg_response_time_ms: float = Field(..., description="Average response time in milliseconds")
     error_count: int = Field(..., description="Total number of errors")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "total_requests": 1250,
-                "avg_response_time_ms": 125.5,
-                "error_count": 3
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "total_requests": 1250,
+            "avg_response_time_ms": 125.5,
+            "error_count": 3
         }
+    })
 
 
 class ErrorResponse(BaseModel):
@@ -114,11 +108,10 @@ class ErrorResponse(BaseModel):
     detail: Optional[str] = Field(None, description="Detailed error information")
     trace_id: Optional[str] = Field(None, description="APM trace ID")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "error": "Processing failed",
-                "detail": "Invalid data format",
-                "trace_id": "abc123-def456"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "error": "Processing failed",
+            "detail": "Invalid data format",
+            "trace_id": "abc123-def456"
         }
+    })
@@ -18,6 +18,13 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def reset_apm_client():
+    """Forget any APM client cached by a previous test."""
+    from app.apm_utils import reset_client_cache
+    reset_client_cache()
+
+
 def test_health_check(client):
     """Test the health check endpoint."""
     response = client.get("/health")
@@ -110,6 +117,21 @@ def test_process_data_success(client):
     assert data["items"] == ["ITEM1", "ITEM2", "ITEM3"]
 
 
+def test_process_data_items_run_concurrently(client):
+    """Test that batch items are processed concurrently, in order."""
+    request_data = {
+        "items": [f"item{i}" for i in range(20)],
+        "delay_ms": 100
+    }
+    response = client.post("/process", json=request_data)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"] == [f"ITEM{i}" for i in range(20)]
+    # Sequential processing would take 2 seconds
+    assert data["total_time_ms"] < 1000
+
+
 def test_process_data_with_default_delay(client):
     """Test data processing with default delay."""
     request_data = {
@@ -176,6 +198,70 @@ def test_metrics_error_tracking(client):
     assert metrics_after["error_count"] > initial_errors
 
 
+def test_metrics_counts_requests_from_all_threads():
+    """Test that requests recorded on several threads, including exited ones, are all counted."""
+    import threading
+    from app.apm_utils import APMMetrics
+
+    metrics = APMMetrics()
+
+    def record():
+        for i in range(1000):
+            metrics.record_request(2_000_000, is_error=(i % 10 == 0))
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.record_request(2_000_000)
+
+    assert metrics.get_metrics() == {
+        "total_requests": 4001,
+        "avg_response_time_ms": 2.0,
+        "error_count": 400
+    }
+
+
+def test_metrics_read_while_thread_exits():
+    """Test that a shard retiring while get_metrics holds the lock neither deadlocks nor is lost."""
+    import threading
+    from app.apm_utils import APMMetrics
+
+    metrics = APMMetrics()
+    held = []
+
+    def record():
+        metrics.record_request(2_000_000)
+        held.append(metrics._local.shard)
+
+    thread = threading.Thread(target=record)
+    thread.start()
+    thread.join()
+
+    shards = metrics._shards
+
+    class DropOnIter:
+        def __iter__(self):
+            # Drop the exited thread's last shard reference mid-read, so its
+            # finalizer runs while get_metrics holds the lock
+            held.clear()
+            return iter(list(shards))
+
+    metrics._shards = DropOnIter()
+    result = []
+    reader = threading.Thread(target=lambda: result.append(metrics.get_metrics()), daemon=True)
+    reader.start()
+    reader.join(timeout=5)
+
+    assert not reader.is_alive()
+    assert result == [{
+        "total_requests": 1,
+        "avg_response_time_ms": 2.0,
+        "error_count": 0
+    }]
+
+
 @patch('app.apm_utils.elasticapm.get_client')
 def test_apm_utils_with_client(mock_get_client):
     """Test APM utilities when client is available."""
@@ -215,6 +301,50 @@ def test_apm_utils_without_client(mock_get_client):
     assert transaction_id is None
 
 
+@patch('app.apm_utils.elasticapm.capture_span')
+@patch('app.apm_utils.elasticapm.get_client')
+def test_capture_span_wraps_only_when_enabled(mock_get_client, mock_capture_span):
+    """Test that capture_span records spans when enabled and is a no-op when disabled."""
+    import asyncio
+    from app.apm_utils import capture_span
+
+    async def work():
+        return "done"
+
+    # Disabled in tests, so the function is returned unchanged
+    assert capture_span("work")(work) is work
+
+    mock_get_client.return_value = MagicMock()
+    with patch('app.apm_utils.get_settings', return_value=MagicMock(elastic_apm_enabled=True, apm_span_min_duration_ms=0.0)):
+        wrapped = capture_span("work", "app.test")(work)
+
+    assert asyncio.run(wrapped()) == "done"
+    mock_capture_span.assert_called_once_with("work", span_type="app.test")
+
+
+@patch('app.apm_utils.elasticapm.capture_span')
+@patch('app.apm_utils.elasticapm.get_client')
+def test_capture_span_skips_fast_calls(mock_get_client, mock_capture_span):
+    """Test that calls below min_duration_ms are not recorded as spans."""
+    import asyncio
+    from app.apm_utils import capture_span
+
+    async def work(delay):
+        await asyncio.sleep(delay)
+        return "done"
+
+    mock_get_client.return_value = MagicMock()
+    with patch('app.apm_utils.get_settings', return_value=MagicMock(elastic_apm_enabled=True, apm_span_min_duration_ms=0.0)):
+        wrapped = capture_span("work", "app.test", min_duration_ms=20)(work)
+
+    assert asyncio.run(wrapped(0)) == "done"
+    mock_capture_span.assert_not_called()
+
+    assert asyncio.run(wrapped(0.03)) == "done"
+    mock_capture_span.assert_called_once()
+    assert mock_capture_span.call_args.kwargs["duration"] >= 0.02
+
+
 def test_concurrent_requests(client):
     """Test handling concurrent requests."""
     import concurrent.futures